@@ -1,7 +1,6 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import xml.etree.ElementTree as ET
-import codecs
+import tbx_extractor
 import threading  # Required to prevent the GUI from freezing
 
 # --- Core Processing Logic ---
@@ -10,50 +9,33 @@ import threading  # Required to prevent the GUI from freezing
 def process_tbx_file(input_file, l1_lang, l2_lang, output_file, status_callback, final_callback):
     """
     Parses the TBX file and writes the output.
+    l2_lang can be a comma-separated list of codes (e.g. "es,fr,de") or "*"
+    for every language of the file; all pairs are written in a single pass.
     This function is designed to run in a separate thread.
     """
     try:
         # 1. Notify the GUI that processing has started
         status_callback(f"Processing {input_file}...")
         
-        namespaces = {
-            'ns': 'urn:iso:std:iso:30042:ed-2',
-            'xml': 'http://www.w3.org/XML/1998/namespace'
-        }
+        language_pairs, pivot = tbx_extractor.parse_language_pairs(l1_lang, l2_lang)
         
-        count = 0
-        
-        # 2. Open output file and parse input
-        with codecs.open(output_file, "w", encoding="utf-8") as output_stream:
-            tree = ET.parse(input_file)
-            root = tree.getroot()
-            concept_entries = root.findall('.//ns:conceptEntry', namespaces)
-
-            for conceptEntry in concept_entries:
-                l1_sec = conceptEntry.find(f'./ns:langSec[@xml:lang="{l1_lang}"]', namespaces)
-                l2_sec = conceptEntry.find(f'./ns:langSec[@xml:lang="{l2_lang}"]', namespaces)
-                
-                if l1_sec is not None and l2_sec is not None:
-                    l1_term_elements = l1_sec.findall('.//ns:term', namespaces)
-                    l1_terms = [term.text.strip() for term in l1_term_elements if term.text]
-                    
-                    l2_term_elements = l2_sec.findall('.//ns:term', namespaces)
-                    l2_terms = [term.text.strip() for term in l2_term_elements if term.text]
-                    
-                    if l1_terms and l2_terms:
-                        l2_string = ", ".join(l2_terms)
-                        for l1_term in l1_terms:
-                            output_stream.write(f"{l1_term}\t{l2_string}\n")
-                            count += 1
+        # 2. Stream the input, one conceptEntry at a time, and write every language pair
+        counts = tbx_extractor.write_term_pairs(input_file, language_pairs, output_file, pivot)
+        count = sum(counts.values())
         
         # 3. Notify the GUI of success
-        final_callback(f"Success! Written {count} lines to {output_file}.", 
-                       "Process Complete", 
-                       "info")
+        if len(counts) == 1 and pivot is None:
+            final_callback(f"Success! Written {count} lines to {output_file}.", 
+                           "Process Complete", 
+                           "info")
+        else:
+            final_callback(f"Success! Written {count} lines for {len(counts)} language pairs.", 
+                           "Process Complete", 
+                           "info")
 
     except FileNotFoundError:
         final_callback("Error: Input file not found.", "Error", "error")
-    except ET.ParseError as e:
+    except tbx_extractor.PARSE_ERRORS as e:
         final_callback(f"Error: Could not parse XML.\nDetail: {e}", "XML Error", "error")
     except Exception as e:
         # Catch any other unexpected error
@@ -95,8 +77,8 @@ class TbxApp:
         ttk.Entry(main_frame, textvariable=self.l1_var, width=10).grid(row=1, column=1, sticky=tk.W, padx=5)
 
         # 3. L2 Language
-        ttk.Label(main_frame, text="L2 Language:").grid(row=2, column=0, sticky=tk.W, pady=5)
-        ttk.Entry(main_frame, textvariable=self.l2_var, width=10).grid(row=2, column=1, sticky=tk.W, padx=5)
+        ttk.Label(main_frame, text="L2 Language(s):").grid(row=2, column=0, sticky=tk.W, pady=5)
+        ttk.Entry(main_frame, textvariable=self.l2_var, width=20).grid(row=2, column=1, sticky=tk.W, padx=5)
 
         # 4. Output File
         ttk.Label(main_frame, text="Output TXT File:").grid(row=3, column=0, sticky=tk.W, pady=5)
@@ -120,7 +102,8 @@ class TbxApp:
         """Opens a dialog to select the input TBX file."""
         filename = filedialog.askopenfilename(
             title="Select TBX File",
-            filetypes=[("TBX files", "*.tbx"), ("XML files", "*.xml"), ("All files", "*.*")]
+            filetypes=[("TBX files", "*.tbx"), ("XML files", "*.xml"),
+                       ("Compressed TBX files", "*.tbx.gz *.tbx.bz2 *.tbx.xz"), ("All files", "*.*")]
         )
         if filename:
             self.input_file_var.set(filename)
@@ -1,5 +1,4 @@
-import xml.etree.ElementTree as ET
-import codecs
+import tbx_extractor
 import argparse  # Import argparse
 import sys       # We keep it for sys.exit on error
 
@@ -7,7 +6,9 @@ def main():
     # 1. Setup Argparse
     parser = argparse.ArgumentParser(
         description="Extracts L1/L2 term pairs from a TBX (IATE) file to a tab-separated format.",
-        epilog="Example usage: python script.py -i my_file.tbx -l1 en -l2 es -o output.txt"
+        epilog="Example usage: python script.py -i my_file.tbx -l1 en -l2 es -o output.txt\n"
+               "Several pairs in one pass: python script.py -i my_file.tbx -l1 en -l2 es,fr,de -o output_{l1}_{l2}.txt",
+        formatter_class=argparse.RawDescriptionHelpFormatter
     )
     
     # Define the arguments the script will accept
@@ -15,82 +16,95 @@ def main():
         "-i", "--input", 
         dest="input_file",  # The variable name in 'args'
         required=True,      # This argument is mandatory
-        help="Input XML (TBX) file."
+        help="Input XML (TBX) file, plain or gzip/bz2/xz compressed."
     )
     parser.add_argument(
         "-l1", "--lang1", 
         dest="l1_lang", 
-        required=True, 
         help="L1 language code (e.g., 'en')."
     )
     parser.add_argument(
         "-l2", "--lang2", 
         dest="l2_lang", 
-        required=True, 
-        help="L2 language code (e.g., 'es')."
+        help="L2 language code (e.g., 'es'), a comma-separated list (e.g., 'es,fr,de') "
+             "or '*' for every language of the file, with L1 as pivot."
+    )
+    parser.add_argument(
+        "-p", "--pair", 
+        dest="pairs", 
+        action="append",
+        default=[],
+        metavar="L1:L2",
+        help="Language pair to export (e.g., 'en:es'). Can be repeated."
     )
     parser.add_argument(
         "-o", "--output", 
         dest="output_file", 
         required=True, 
-        help="Output file (tab-separated text)."
+        help="Output file (tab-separated text). With several pairs, {l1} and {l2} "
+             "are replaced by the language codes, or '.l1-l2' is added before the extension."
+    )
+    parser.add_argument(
+        "-w", "--workers", 
+        dest="workers", 
+        type=int,
+        default=1,
+        help="Number of worker processes. The (uncompressed) TBX file is split on "
+             "conceptEntry boundaries and the chunks are parsed in parallel (default: 1)."
+    )
+    parser.add_argument(
+        "--parser", 
+        dest="backend", 
+        choices=tbx_extractor.BACKENDS,
+        default="auto",
+        help="XML parser: 'lxml' (faster), 'etree' (standard library) or 'auto' "
+             "(lxml if installed, default)."
     )
     
     # Parse the command-line arguments
     args = parser.parse_args()
 
-    # 2. Define the namespaces
-    namespaces = {
-        'ns': 'urn:iso:std:iso:30042:ed-2',
-        'xml': 'http://www.w3.org/XML/1998/namespace'
-    }
+    # Collect the language pairs to export in a single pass
+    language_pairs, pivot = [], None
+    if args.l1_lang or args.l2_lang:
+        if not (args.l1_lang and args.l2_lang):
+            parser.error("-l1 and -l2 must be used together.")
+        language_pairs, pivot = tbx_extractor.parse_language_pairs(args.l1_lang, args.l2_lang)
+    for pair in args.pairs:
+        l1_lang, separator, l2_lang = pair.partition(":")
+        if not separator or not l1_lang or not l2_lang:
+            parser.error(f"Invalid language pair '{pair}' (use L1:L2, e.g., en:es).")
+        if (l1_lang, l2_lang) not in language_pairs:
+            language_pairs.append((l1_lang, l2_lang))
+    if not language_pairs and pivot is None:
+        parser.error("Give the languages with -l1/-l2 or -p.")
 
-    # 3. Process the file
+    # 2. Process the file
     try:
         print(f"Processing file: {args.input_file}...")
         
-        # Use 'with' to open the output file. It will be closed automatically.
-        with codecs.open(args.output_file, "w", encoding="utf-8") as output_stream:
-            
-            # Parse the input file
-            tree = ET.parse(args.input_file)
-            root = tree.getroot()
-
-            concept_entries = root.findall('.//ns:conceptEntry', namespaces)
-            count = 0
+        # Stream the input file: one conceptEntry at a time is kept in memory,
+        # and every language pair is written during the same pass
+        counts = tbx_extractor.write_term_pairs(args.input_file, language_pairs, args.output_file, pivot,
+                                                workers=args.workers, backend=args.backend)
 
-            for conceptEntry in concept_entries:
-                # Find the sections using the arguments from 'args'
-                l1_sec = conceptEntry.find(f'./ns:langSec[@xml:lang="{args.l1_lang}"]', namespaces)
-                l2_sec = conceptEntry.find(f'./ns:langSec[@xml:lang="{args.l2_lang}"]', namespaces)
-                
-                # Check if both language sections exist
-                if l1_sec is not None and l2_sec is not None:
-                    # Get all L1 terms
-                    l1_term_elements = l1_sec.findall('.//ns:term', namespaces)
-                    l1_terms = [term.text.strip() for term in l1_term_elements if term.text]
-            
-                    # Get all L2 terms
-                    l2_term_elements = l2_sec.findall('.//ns:term', namespaces)
-                    l2_terms = [term.text.strip() for term in l2_term_elements if term.text]
-                    
-                    # If we have terms in both lists, write them
-                    if l1_terms and l2_terms:
-                        l2_string = ", ".join(l2_terms)
-                        for l1_term in l1_terms:
-                            # Write to the output file (not 'print')
-                            # Add a newline character '\n'
-                            output_stream.write(f"{l1_term}\t{l2_string}\n")
-                            count += 1
-
-        print(f"Process complete. Written {count} lines to {args.output_file}.")
+        if len(counts) == 1 and pivot is None:
+            print(f"Process complete. Written {sum(counts.values())} lines to {args.output_file}.")
+        else:
+            for (l1_lang, l2_lang), count in counts.items():
+                output_file = tbx_extractor.pair_output_file(args.output_file, l1_lang, l2_lang)
+                print(f"{l1_lang}-{l2_lang}: written {count} lines to {output_file}.")
+            print(f"Process complete. Written {sum(counts.values())} lines for {len(counts)} language pairs.")
 
     except FileNotFoundError:
         print(f"Error: Input file '{args.input_file}' not found.", file=sys.stderr)
         sys.exit(1)
-    except ET.ParseError as e:
+    except tbx_extractor.PARSE_ERRORS as e:
         print(f"Error: Could not parse XML in '{args.input_file}'. Detail: {e}", file=sys.stderr)
         sys.exit(1)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
     except IOError as e:
         print(f"Error: Could not write to output file '{args.output_file}'. Detail: {e}", file=sys.stderr)
         sys.exit(1)
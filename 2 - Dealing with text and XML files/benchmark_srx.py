@@ -0,0 +1,47 @@
+import file_input
+import argparse
+import time
+import srx_segmenter
+
+# Compares the SRX engines of srx_segmenter with the original
+# SrxSegmenter.extract() on a text file: same output and time per engine.
+# Example: python benchmark_srx.py -i life-sciences-1K-eng.txt -s segment.srx -l English
+
+parser = argparse.ArgumentParser(description="Benchmarks the SRX segmentation engines.")
+parser.add_argument("-i", "--input", required=True, help="The input text file to segment.")
+parser.add_argument("-s", "--srx", default="segment.srx", help="The SRX rules file.")
+parser.add_argument("-l", "--lang", default="English", help="The language rule to use.")
+parser.add_argument("-r", "--repeat", type=int, default=3, help="Number of timed runs per engine.")
+args = parser.parse_args()
+
+rules = srx_segmenter.parse(args.srx)
+rule = rules[args.lang]
+
+with file_input.open_text(args.input) as inputstream:
+    lines = [linia.rstrip() for linia in inputstream]
+
+
+def best_time(function):
+    best = None
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+
+reference_time, reference = best_time(
+    lambda: [srx_segmenter.SrxSegmenter(rule, linia).extract() for linia in lines]
+)
+print(f"{len(lines)} lines, {len(rule['breaks'])} break and {len(rule['non_breaks'])} non break rules")
+print(f"{'extract':>10}: {reference_time:8.3f} s")
+
+for engine in srx_segmenter.ENGINES:
+    segmenter = srx_segmenter.compile_rule(rule, engine)
+    elapsed, result = best_time(lambda: [segmenter.segment(linia) for linia in lines])
+    different = [linia for linia, a, b in zip(lines, reference, result) if a != b]
+    print(f"{engine:>10}: {elapsed:8.3f} s  x{reference_time / elapsed:5.1f}  lines different from extract: {len(different)}")
+    for linia in different:
+        print(f"{'':>12}{linia[:100]}")
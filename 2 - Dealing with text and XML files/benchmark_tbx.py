@@ -0,0 +1,78 @@
+import argparse
+import io
+import time
+import tbx_extractor
+import regex
+
+# Compares the per-entry language section selection of tbx_extractor
+# (langSec children bucketed by xml:lang in one pass) with the previous
+# find('./ns:langSec[@xml:lang="..."]') calls, on a TBX file whose
+# conceptEntry elements are repeated to make it bigger.
+# Example: python benchmark_tbx.py -i IATE_export_short.tbx -n 20000
+
+parser = argparse.ArgumentParser(description="Benchmarks langSec selection in TBX extraction.")
+parser.add_argument("-i", "--input", default="IATE_export_short.tbx", help="Input TBX file.")
+parser.add_argument("-n", "--copies", type=int, default=20000, help="Number of copies of the conceptEntry elements.")
+parser.add_argument("-l1", "--lang1", default="en", help="L1 language code.")
+parser.add_argument("-l2", "--lang2", default="es", help="L2 language code.")
+parser.add_argument("-b", "--backend", choices=tbx_extractor.BACKENDS, default="auto", help="XML parser backend.")
+args = parser.parse_args()
+
+with open(args.input, "rb") as inputstream:
+    data = inputstream.read()
+
+# Repeat the conceptEntry elements of the file inside the same body
+entries = regex.search(rb"<conceptEntry[\s>].*</conceptEntry>", data, flags=regex.DOTALL)
+data = data[:entries.start()] + entries.group(0) * args.copies + data[entries.end():]
+entry_count = args.copies * len(regex.findall(rb"<conceptEntry[\s>]", entries.group(0)))
+
+namespaces = tbx_extractor.NAMESPACES
+
+
+def find_terms(concept_entry, lang):
+    # Previous approach: one predicate path per language
+    lang_sec = concept_entry.find(f'./ns:langSec[@xml:lang="{lang}"]', namespaces)
+    if lang_sec is None:
+        return []
+    term_elements = lang_sec.findall('.//ns:term', namespaces)
+    return [term.text.strip() for term in term_elements if term.text]
+
+
+def find_pair(concept_entry):
+    return find_terms(concept_entry, args.lang1), find_terms(concept_entry, args.lang2)
+
+
+def bucket_pair(concept_entry):
+    lang_sections = tbx_extractor.get_lang_sections(concept_entry)
+    return (tbx_extractor.get_section_terms(lang_sections.get(args.lang1)),
+            tbx_extractor.get_section_terms(lang_sections.get(args.lang2)))
+
+
+def run(select_terms):
+    parse_time = 0.0
+    select_time = 0.0
+    pairs = []
+    entries = tbx_extractor.iter_concept_entries(io.BytesIO(data), args.backend)
+    while True:
+        start = time.perf_counter()
+        concept_entry = next(entries, None)
+        parse_time += time.perf_counter() - start
+        if concept_entry is None:
+            break
+
+        start = time.perf_counter()
+        l1_terms, l2_terms = select_terms(concept_entry)
+        select_time += time.perf_counter() - start
+        if l1_terms and l2_terms:
+            pairs.append((tuple(l1_terms), tuple(l2_terms)))
+    return parse_time, select_time, pairs
+
+
+print(f"{len(data) / 1e6:.1f} MB, {entry_count} conceptEntry elements, "
+      f"{tbx_extractor.resolve_backend(args.backend)} parser")
+_, find_time, find_pairs = run(find_pair)
+parse_time, bucket_time, bucket_pairs = run(bucket_pair)
+print(f"parsing:          {parse_time:8.3f} s")
+print(f"find() per lang:  {find_time:8.3f} s")
+print(f"bucket by lang:   {bucket_time:8.3f} s  x{find_time / bucket_time:4.1f}")
+print(f"same term pairs:  {find_pairs == bucket_pairs}")
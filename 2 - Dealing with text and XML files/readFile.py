@@ -1,9 +1,9 @@
-import codecs
+import file_input
 import sys
 
 inputfilename=sys.argv[1]
 
-inputstream=codecs.open(inputfilename,"r",encoding="utf-8")
+inputstream=file_input.open_text(inputfilename)
 
 for linia in inputstream:
     linia=linia.rstrip()
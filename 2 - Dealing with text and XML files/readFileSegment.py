@@ -1,4 +1,5 @@
 import codecs
+import file_input
 import sys
 import srx_segmenter
 import regex
@@ -10,14 +11,14 @@ srxlang=sys.argv[3]
 outputfilename=sys.argv[4]
 
 rules = srx_segmenter.parse(srxfile)
+segmenter = srx_segmenter.CompiledSrxSegmenter(rules[srxlang])
 
-inputstream=codecs.open(inputfilename,"r",encoding="utf-8")
+inputstream=file_input.open_text(inputfilename)
 outputstream=codecs.open(outputfilename,"w",encoding="utf-8")
 
 for linia in inputstream:
     linia=linia.rstrip()
-    segmenter = srx_segmenter.SrxSegmenter(rules[srxlang],linia)
-    segments=segmenter.extract() 
+    segments=segmenter.segment(linia)
     for segment in segments[0]:
         print(segment)
         outputstream.write(segment+"\n")
@@ -1,4 +1,5 @@
 import codecs
+import file_input
 import argparse  # 1. Import argparse
 import srx_segmenter
 import regex
@@ -26,7 +27,8 @@ parser.add_argument(
 parser.add_argument(
     "-l", "--lang",
     required=True,  # This argument is mandatory
-    help="The language code from the SRX file to use (e.g., en, ca).",
+    help="The language code to segment (e.g., en, en-GB, ca), resolved with the maprules "
+         "of the SRX file, or a language rule name from the SRX file (e.g., English).",
     metavar="LANG_CODE"
 )
 # 4. Add the new output file argument
@@ -36,6 +38,13 @@ parser.add_argument(
     help="The file to write the segmented output to.",
     metavar="OUTPUT_FILE"
 )
+parser.add_argument(
+    "-e", "--engine",
+    default="finditer",
+    choices=list(srx_segmenter.ENGINES),
+    help="The SRX engine: 'finditer' (every rule searched over the line) or 'scan' (break rules "
+         "searched, non break rules only tried at the candidate break points)."
+)
 
 # 5. Process the arguments provided by the user
 args = parser.parse_args()
@@ -45,22 +54,32 @@ inputfilename = args.input
 srxfile = args.srx
 srxlang = args.lang
 outputfilename = args.output  # The new output file path
+engine = args.engine
 
 # --- Main Script Logic ---
 
 # It's good practice to add error handling
 try:
-    rules = srx_segmenter.parse(srxfile)
-    
+    srx = srx_segmenter.SrxRules(srxfile)
+
     # Check if the language exists before opening files
-    if srxlang not in rules:
+    if srxlang not in srx.rules and not srx.get_rule_names(srxlang):
         print(f"Error: Language '{srxlang}' not found in SRX file '{srxfile}'.")
-        print(f"Available languages: {list(rules.keys())}")
+        print(f"Available languages: {list(srx.rules.keys())}")
         exit() # Exit the script
 
+    # Compile the rules of the language only once, not once per line
+    if srxlang in srx.rules:
+        # A language rule name is used on its own
+        segmenter = srx_segmenter.compile_rule(srx.rules[srxlang], engine)
+    else:
+        # A language code gets all its rules in cascade order (e.g., English + Default)
+        print(f"Language rules for '{srxlang}': {srx.get_rule_names(srxlang)}")
+        segmenter = srx.get_segmenter(srxlang, engine)
+
     # 7. Use 'with' for both input and output files
     # This ensures both are closed properly, even if an error occurs
-    with codecs.open(inputfilename, "r", encoding="utf-8") as inputstream, \
+    with file_input.open_text(inputfilename) as inputstream, \
          codecs.open(outputfilename, "w", encoding="utf-8") as outputstream:
         
         print(f"Processing '{inputfilename}'...")
@@ -70,8 +89,7 @@ try:
             if not linia:  # Skip empty lines
                 continue
                 
-            segmenter = srx_segmenter.SrxSegmenter(rules[srxlang], linia)
-            segments = segmenter.extract()
+            segments = segmenter.segment(linia)
             
             # segments[0] contains the list of segments
             if segments and segments[0]:
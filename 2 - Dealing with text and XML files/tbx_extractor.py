@@ -0,0 +1,391 @@
+"""Extract term pairs from TBX files.
+"""
+__version__ = '0.0.2'
+
+import codecs
+import io
+import multiprocessing
+import os
+import regex
+import xml.etree.ElementTree as ET
+import file_input
+
+try:
+    import lxml.etree
+except ImportError:
+    lxml = None
+from typing import (
+    BinaryIO,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union
+)
+
+NAMESPACES = {
+    'ns': 'urn:iso:std:iso:30042:ed-2',
+    'xml': 'http://www.w3.org/XML/1998/namespace'
+}
+CONCEPT_ENTRY = '{{{}}}conceptEntry'.format(NAMESPACES['ns'])
+LANG_SEC = '{{{}}}langSec'.format(NAMESPACES['ns'])
+TERM = '{{{}}}term'.format(NAMESPACES['ns'])
+XML_LANG = '{{{}}}lang'.format(NAMESPACES['xml'])
+
+# conceptEntry tags, with or without a namespace prefix (e.g. <conceptEntry> or <t:conceptEntry>)
+CONCEPT_ENTRY_START = regex.compile(rb'<(?:[^\s<>/:?!]+:)?conceptEntry[\s>/]')
+CONCEPT_ENTRY_END = regex.compile(rb'</(?:[^\s<>/:?!]+:)?conceptEntry\s*>')
+ROOT_START = regex.compile(rb'<([^?!/\s>][^\s>/]*)[^>]*>')
+NAMESPACE_DECLARATION = regex.compile(rb'\s(xmlns(?::[^\s=>]+)?)\s*=\s*(?:"[^"]*"|\'[^\']*\')')
+# Longest tag that may be cut at the edge of a search window
+TAG_OVERLAP = 256
+CHUNK_SIZE = 32 << 20
+
+# Parser backends: lxml (C iterparse with tag filtering) when installed, else ElementTree
+BACKENDS = ('auto', 'lxml', 'etree')
+PARSE_ERRORS = (ET.ParseError, lxml.etree.XMLSyntaxError) if lxml is not None else (ET.ParseError,)
+
+
+def resolve_backend(backend: str = 'auto') -> str:
+    """Return the parser backend to use for backend ('auto' picks lxml if installed).
+    """
+    if backend not in BACKENDS:
+        raise ValueError('Unknown parser backend: {} (use one of {})'.format(backend, ', '.join(BACKENDS)))
+    if backend == 'auto':
+        return 'lxml' if lxml is not None else 'etree'
+    if backend == 'lxml' and lxml is None:
+        raise ValueError('The lxml parser backend needs lxml to be installed')
+    return backend
+
+
+def iter_concept_entries(source: Union[str, BinaryIO], backend: str = 'auto') -> Iterator[ET.Element]:
+    """Yield the conceptEntry elements of a TBX file one at a time.
+
+    Each entry is cleared and detached from its parent once the caller is
+    done with it, so memory use does not grow with the size of the file.
+    A file name may point to a gzip, bz2 or xz compressed TBX, which is
+    decompressed on the fly in a worker thread.
+    :param source: is a TBX file name or binary file object.
+    :param backend: is one of ``BACKENDS``.
+    :return: iterator of conceptEntry elements
+    """
+    if isinstance(source, str):
+        with file_input.open_binary(source, threaded=True) as stream:
+            yield from iter_concept_entries(stream, backend)
+        return
+
+    if resolve_backend(backend) == 'lxml':
+        yield from _iter_concept_entries_lxml(source)
+        return
+
+    open_elements = []  # type: List[ET.Element]
+    for event, elem in ET.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            open_elements.append(elem)
+            continue
+
+        open_elements.pop()
+        if elem.tag != CONCEPT_ENTRY:
+            continue
+
+        yield elem
+
+        elem.clear()
+        if open_elements:
+            open_elements[-1].remove(elem)
+
+
+def _iter_concept_entries_lxml(source: BinaryIO) -> Iterator[ET.Element]:
+    # Only conceptEntry end events reach Python; the rest is handled in C
+    for _, elem in lxml.etree.iterparse(source, events=('end',), tag=CONCEPT_ENTRY):
+        yield elem
+
+        elem.clear()
+        # Drop the entries already done, which lxml keeps in the tree
+        parent = elem.getparent()
+        if parent is not None:
+            while elem.getprevious() is not None:
+                del parent[0]
+
+
+def get_lang_sections(concept_entry: ET.Element) -> Dict[str, ET.Element]:
+    """Return the langSec children of concept_entry by language code, in one pass over the children.
+
+    As with ``find``, the first langSec of a language wins.
+    """
+    lang_sections = {}  # type: Dict[str, ET.Element]
+    for child in concept_entry:
+        if child.tag == LANG_SEC:
+            lang = child.get(XML_LANG)
+            if lang is not None and lang not in lang_sections:
+                lang_sections[lang] = child
+    return lang_sections
+
+
+def get_section_terms(lang_sec: Optional[ET.Element]) -> List[str]:
+    """Return the terms of a langSec element (none if lang_sec is None).
+    """
+    if lang_sec is None:
+        return []
+    return [term.text.strip() for term in lang_sec.iter(TERM) if term.text]
+
+
+def get_terms(concept_entry: ET.Element, lang: str) -> List[str]:
+    """Return the terms of concept_entry in language lang.
+    """
+    return get_section_terms(get_lang_sections(concept_entry).get(lang))
+
+
+def get_languages(concept_entry: ET.Element) -> List[str]:
+    """Return the language codes of the langSec elements of concept_entry.
+    """
+    return list(get_lang_sections(concept_entry))
+
+
+def parse_language_pairs(l1_lang: str, l2_langs: str) -> Tuple[List[Tuple[str, str]], Optional[str]]:
+    """Return the language pairs and pivot language asked for by l1_lang and l2_langs.
+
+    l2_langs is a comma separated list of codes (e.g. "es,fr,de"), or "*"
+    for every language found in the file, with l1_lang as pivot.
+    :return: list of (L1, L2) and pivot language or None
+    """
+    if l2_langs.strip() == '*':
+        return [], l1_lang
+    return [(l1_lang, l2_lang.strip()) for l2_lang in l2_langs.split(',') if l2_lang.strip()], None
+
+
+def extract_multi_term_pairs(source: Union[str, BinaryIO],
+                             language_pairs: List[Tuple[str, str]],
+                             pivot: Optional[str] = None,
+                             backend: str = 'auto') -> Iterator[Tuple[Tuple[str, str], str, str]]:
+    """Yield ((L1, L2), L1 term, comma separated L2 terms) for several language pairs in one pass.
+    :param source: is a (possibly compressed) TBX file name or binary file object.
+    :param language_pairs: is a list of (L1, L2) language codes.
+    :param pivot: adds (pivot, L2) for every other language L2 of each entry.
+    :param backend: is the parser backend, one of ``BACKENDS``.
+    :return: iterator of language pair and term pair
+    """
+    for concept_entry in iter_concept_entries(source, backend):
+        lang_sections = get_lang_sections(concept_entry)
+        entry_pairs = language_pairs
+        if pivot is not None:
+            entry_pairs = language_pairs + [
+                (pivot, lang) for lang in lang_sections
+                if lang != pivot and (pivot, lang) not in language_pairs
+            ]
+
+        terms = {}  # type: Dict[str, List[str]]
+        for l1_lang, l2_lang in entry_pairs:
+            if l1_lang not in terms:
+                terms[l1_lang] = get_section_terms(lang_sections.get(l1_lang))
+            l1_terms = terms[l1_lang]
+            if not l1_terms:
+                continue
+            if l2_lang not in terms:
+                terms[l2_lang] = get_section_terms(lang_sections.get(l2_lang))
+            l2_terms = terms[l2_lang]
+            if not l2_terms:
+                continue
+
+            l2_string = ", ".join(l2_terms)
+            for l1_term in l1_terms:
+                yield (l1_lang, l2_lang), l1_term, l2_string
+
+
+def extract_term_pairs(source: Union[str, BinaryIO], l1_lang: str, l2_lang: str,
+                       backend: str = 'auto') -> Iterator[Tuple[str, str]]:
+    """Yield (L1 term, comma separated L2 terms) for every L1 term of the TBX file.
+    :param source: is a (possibly compressed) TBX file name or binary file object.
+    :param l1_lang: is the L1 language code (e.g. en).
+    :param l2_lang: is the L2 language code (e.g. es).
+    :param backend: is the parser backend, one of ``BACKENDS``.
+    :return: iterator of term pairs
+    """
+    for _, l1_term, l2_string in extract_multi_term_pairs(source, [(l1_lang, l2_lang)], backend=backend):
+        yield l1_term, l2_string
+
+
+def split_concept_entries(filepath: str, chunk_size: int = CHUNK_SIZE,
+                          min_chunks: int = 1) -> Tuple[bytes, bytes, List[Tuple[int, int]]]:
+    """Split a plain (uncompressed, UTF-8) TBX file into byte ranges of whole conceptEntry elements.
+
+    Each range starts at a ``<conceptEntry`` tag and ends where the next
+    range starts, the last one after the last ``</conceptEntry>``.
+    The namespaces declared between the root and the first entry (e.g. on
+    ``<body>``) are added to the root start tag of the header, so prefixed
+    entries still parse on their own.
+    :param filepath: is the TBX file.
+    :param chunk_size: is the approximate size of a range in bytes.
+    :param min_chunks: is the minimum number of ranges (e.g. one per worker).
+    :return: XML header up to the root start tag, root end tag and list of (start, end),
+             with no ranges if the file has no conceptEntry or its root is not found
+    """
+    file_size = os.path.getsize(filepath)
+    with open(filepath, 'rb') as stream:
+        start = _find_entry_start(stream, 0, file_size)
+        if start is None:
+            return b'', b'', []
+        end = _find_entry_end(stream, start, file_size)
+        stream.seek(0)
+        head = stream.read(start)
+        root_start = ROOT_START.search(head)
+        if end is None or root_start is None:
+            return b'', b'', []
+        header = _add_namespace_declarations(head[:root_start.end()], head[root_start.end():])
+        footer = b'</' + root_start.group(1) + b'>'
+
+        chunk_size = max(1, min(chunk_size, (end - start) // max(1, min_chunks)))
+        starts = [start]
+        while True:
+            offset = starts[-1] + chunk_size
+            if offset >= end:
+                break
+            next_start = _find_entry_start(stream, offset, end)
+            if next_start is None:
+                break
+            starts.append(next_start)
+
+    return header, footer, list(zip(starts, starts[1:] + [end]))
+
+
+def _find_entry_start(stream: BinaryIO, offset: int, end: int, window: int = 1 << 16) -> Optional[int]:
+    while offset < end:
+        stream.seek(offset)
+        # Overlap the windows so a tag cut at the edge is still found
+        data = stream.read(window + TAG_OVERLAP)
+        match = CONCEPT_ENTRY_START.search(data)
+        if match is not None:
+            return offset + match.start() if offset + match.start() < end else None
+        offset += window
+    return None
+
+
+def _find_entry_end(stream: BinaryIO, start: int, end: int, window: int = 1 << 20) -> Optional[int]:
+    # Search backwards from end for the last </conceptEntry>, a window at a time
+    while end > start:
+        window_start = max(start, end - window)
+        stream.seek(window_start)
+        data = stream.read(end - window_start + TAG_OVERLAP)
+        last_match = None
+        for last_match in CONCEPT_ENTRY_END.finditer(data):
+            pass
+        if last_match is not None:
+            return window_start + last_match.end()
+        end = window_start
+    return None
+
+
+def _add_namespace_declarations(root_start_tag: bytes, data: bytes) -> bytes:
+    # Copy to the root start tag the namespaces declared in data and not in the tag itself
+    declared = {match.group(1) for match in NAMESPACE_DECLARATION.finditer(root_start_tag)}
+    declarations = []
+    for match in NAMESPACE_DECLARATION.finditer(data):
+        if match.group(1) not in declared:
+            declared.add(match.group(1))
+            declarations.append(match.group(0))
+    if not declarations:
+        return root_start_tag
+    return root_start_tag[:-1] + b''.join(declarations) + b'>'
+
+
+def _extract_chunk(task: Tuple[str, bytes, bytes, int, int, List[Tuple[str, str]], Optional[str], str]
+                   ) -> List[Tuple[Tuple[str, str], str, str]]:
+    filepath, header, footer, start, end, language_pairs, pivot, backend = task
+    with open(filepath, 'rb') as stream:
+        stream.seek(start)
+        chunk = stream.read(end - start)
+    document = io.BytesIO(b''.join((header, chunk, footer)))
+    return list(extract_multi_term_pairs(document, language_pairs, pivot, backend))
+
+
+def extract_multi_term_pairs_parallel(filepath: str,
+                                      language_pairs: List[Tuple[str, str]],
+                                      pivot: Optional[str] = None,
+                                      workers: Optional[int] = None,
+                                      chunk_size: int = CHUNK_SIZE,
+                                      backend: str = 'auto') -> Iterator[Tuple[Tuple[str, str], str, str]]:
+    """Same as ``extract_multi_term_pairs`` on a pool of worker processes.
+
+    The file is split on conceptEntry boundaries (see
+    ``split_concept_entries``), the chunks are parsed in parallel and their
+    term pairs are yielded in the original order. Compressed files cannot
+    be split by byte offset and are read in this process, and so are files
+    that can not be split (e.g. without any conceptEntry).
+    :param workers: is the number of processes (default: number of CPUs).
+    """
+    if file_input.detect_compression(filepath) is not None:
+        yield from extract_multi_term_pairs(filepath, language_pairs, pivot, backend)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    header, footer, chunks = split_concept_entries(filepath, chunk_size, min_chunks=workers)
+    if not chunks:
+        yield from extract_multi_term_pairs(filepath, language_pairs, pivot, backend)
+        return
+
+    tasks = [
+        (filepath, header, footer, start, end, language_pairs, pivot, backend)
+        for start, end in chunks
+    ]
+    with multiprocessing.Pool(min(workers, max(1, len(tasks)))) as pool:
+        for chunk_term_pairs in pool.imap(_extract_chunk, tasks):
+            yield from chunk_term_pairs
+
+
+def pair_output_file(output_file: str, l1_lang: str, l2_lang: str) -> str:
+    """Return the output file name of a language pair.
+
+    {l1} and {l2} in output_file are replaced by the language codes,
+    otherwise ".l1-l2" is added before the extension (out.txt -> out.en-es.txt).
+    """
+    if '{l1}' in output_file or '{l2}' in output_file:
+        return output_file.replace('{l1}', l1_lang).replace('{l2}', l2_lang)
+    root, extension = os.path.splitext(output_file)
+    return '{}.{}-{}{}'.format(root, l1_lang, l2_lang, extension)
+
+
+def write_term_pairs(source: Union[str, BinaryIO],
+                     language_pairs: List[Tuple[str, str]],
+                     output_file: str,
+                     pivot: Optional[str] = None,
+                     workers: int = 1,
+                     backend: str = 'auto') -> Dict[Tuple[str, str], int]:
+    """Write the tab separated term pairs of every language pair in one pass over the TBX file.
+
+    A single language pair without pivot is written to output_file itself,
+    otherwise each pair gets its own file (see ``pair_output_file``).
+    With workers > 1 a TBX file name is parsed in parallel chunks
+    (see ``extract_multi_term_pairs_parallel``); the output is the same.
+    backend selects the XML parser (see ``BACKENDS``).
+    :return: number of lines written per language pair
+    """
+    single_output = len(language_pairs) == 1 and pivot is None
+    output_streams = {}  # type: Dict[Tuple[str, str], codecs.StreamReaderWriter]
+    counts = {}  # type: Dict[Tuple[str, str], int]
+
+    def open_output(language_pair: Tuple[str, str]) -> None:
+        filename = output_file if single_output else pair_output_file(output_file, *language_pair)
+        output_streams[language_pair] = codecs.open(filename, "w", encoding="utf-8")
+        counts[language_pair] = 0
+
+    try:
+        for language_pair in language_pairs:
+            open_output(language_pair)
+
+        if workers > 1 and isinstance(source, str):
+            term_pairs = extract_multi_term_pairs_parallel(source, language_pairs, pivot, workers, backend=backend)
+        else:
+            term_pairs = extract_multi_term_pairs(source, language_pairs, pivot, backend)
+
+        for language_pair, l1_term, l2_string in term_pairs:
+            if language_pair not in output_streams:
+                # New language found in pivot mode
+                open_output(language_pair)
+            output_streams[language_pair].write(f"{l1_term}\t{l2_string}\n")
+            counts[language_pair] += 1
+    finally:
+        for output_stream in output_streams.values():
+            output_stream.close()
+
+    return counts
@@ -0,0 +1,217 @@
+"""Memory-mapped termbase index for fast term lookups.
+
+The index is a single binary file:
+
+* 8 bytes magic number and 8 bytes number of records N (little-endian),
+* N + 1 offsets (8 bytes, little-endian) into the record data,
+* the records ``casefolded term\\tterm\\ttranslations\\n`` in UTF-8, sorted
+  by the casefolded term.
+
+Lookups binary search the offsets in the memory-mapped file, so nothing is
+loaded into memory and no XML is parsed.
+
+Example usage:
+    python termbase_index.py build -i IATE_export.tbx.gz -l1 en -l2 es -o iate.en-es.idx
+    python termbase_index.py build -t terms-en-es.txt -o iate.en-es.idx
+    python termbase_index.py query -x iate.en-es.idx porbeagle
+    python termbase_index.py query -x iate.en-es.idx --prefix "dna s"
+"""
+__version__ = '0.0.1'
+
+import argparse
+import mmap
+import struct
+import sys
+import file_input
+import tbx_extractor
+from typing import (
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple
+)
+
+MAGIC = b'TBIDX\x00\x00\x01'
+HEADER = struct.Struct('<8sQ')
+OFFSET = struct.Struct('<Q')
+
+
+def read_tab_file(filepath: str) -> Iterator[Tuple[str, str]]:
+    """Yield (term, translations) from a tab separated file written by TBX2tabtxt.
+    """
+    with file_input.open_text(filepath) as inputstream:
+        for linia in inputstream:
+            term, separator, translations = linia.rstrip('\r\n').partition('\t')
+            if separator and term:
+                yield term, translations
+
+
+def build(term_pairs: Iterable[Tuple[str, str]], index_filepath: str) -> int:
+    """Write the index of term_pairs to index_filepath.
+
+    The records are sorted in memory, so building needs the whole termbase
+    once; lookups afterwards do not.
+    :param term_pairs: is an iterable of (term, translations).
+    :param index_filepath: is the output index file.
+    :return: number of records
+    """
+    records = [
+        record for _, record in sorted(
+            (term.casefold().encode('utf-8'), '{}\t{}\t{}\n'.format(term.casefold(), term, translations).encode('utf-8'))
+            for term, translations in term_pairs
+        )
+    ]
+
+    with open(index_filepath, 'wb') as outputstream:
+        outputstream.write(HEADER.pack(MAGIC, len(records)))
+        offset = 0
+        for record in records:
+            outputstream.write(OFFSET.pack(offset))
+            offset += len(record)
+        outputstream.write(OFFSET.pack(offset))
+        for record in records:
+            outputstream.write(record)
+
+    return len(records)
+
+
+class TermbaseIndex:
+    """Look up terms in an index file written by ``build``.
+    """
+    def __init__(self, index_filepath: str) -> None:
+        self.stream = open(index_filepath, 'rb')
+        self.data = mmap.mmap(self.stream.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.size = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError('Not a termbase index: {}'.format(index_filepath))
+        self.records_start = HEADER.size + OFFSET.size * (self.size + 1)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __enter__(self) -> 'TermbaseIndex':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.data.close()
+        self.stream.close()
+
+    def _offset(self, position: int) -> int:
+        return self.records_start + OFFSET.unpack_from(self.data, HEADER.size + OFFSET.size * position)[0]
+
+    def _key(self, position: int) -> bytes:
+        start = self._offset(position)
+        return self.data[start:self.data.find(b'\t', start)]
+
+    def _record(self, position: int) -> Tuple[str, str]:
+        record = self.data[self._offset(position):self._offset(position + 1)].decode('utf-8')
+        _, term, translations = record.rstrip('\n').split('\t', 2)
+        return term, translations
+
+    def _first_position(self, key: bytes) -> int:
+        # First record whose key is >= key
+        low, high = 0, self.size
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def lookup_casefold(self, term: str) -> List[Tuple[str, str]]:
+        """Return (term, translations) of every term equal to term ignoring case.
+        """
+        key = term.casefold().encode('utf-8')
+        results = []
+        position = self._first_position(key)
+        while position < self.size and self._key(position) == key:
+            results.append(self._record(position))
+            position += 1
+        return results
+
+    def lookup(self, term: str) -> List[Tuple[str, str]]:
+        """Return (term, translations) of every term equal to term.
+        """
+        return [record for record in self.lookup_casefold(term) if record[0] == term]
+
+    def lookup_prefix(self, prefix: str, limit: Optional[int] = None) -> List[Tuple[str, str]]:
+        """Return (term, translations) of the terms starting with prefix, ignoring case.
+        """
+        key = prefix.casefold().encode('utf-8')
+        results = []
+        position = self._first_position(key)
+        while position < self.size and self._key(position).startswith(key):
+            if limit is not None and len(results) >= limit:
+                break
+            results.append(self._record(position))
+            position += 1
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Builds and queries a memory-mapped termbase index.",
+        epilog=__doc__[__doc__.index("Example usage:"):],
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Build an index from a TBX file or a tab-separated file.")
+    source = build_parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("-i", "--input", dest="input_file", help="Input TBX file (plain or compressed).")
+    source.add_argument("-t", "--tab", dest="tab_file", help="Input tab-separated file (output of TBX2tabtxt).")
+    build_parser.add_argument("-l1", "--lang1", dest="l1_lang", help="L1 language code, with -i (e.g., 'en').")
+    build_parser.add_argument("-l2", "--lang2", dest="l2_lang", help="L2 language code, with -i (e.g., 'es').")
+    build_parser.add_argument("-o", "--output", dest="index_file", required=True, help="Output index file.")
+
+    query_parser = subparsers.add_parser("query", help="Look up terms in an index.")
+    query_parser.add_argument("-x", "--index", dest="index_file", required=True, help="Index file.")
+    mode = query_parser.add_mutually_exclusive_group()
+    mode.add_argument("--casefold", action="store_true", help="Ignore case.")
+    mode.add_argument("--prefix", action="store_true", help="Find terms starting with the query (ignoring case).")
+    query_parser.add_argument("--limit", type=int, default=20, help="Maximum results per prefix query (default: 20).")
+    query_parser.add_argument("terms", nargs="+", help="Terms to look up.")
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == "build":
+            if args.input_file:
+                if not args.l1_lang or not args.l2_lang:
+                    parser.error("-l1 and -l2 are needed to build from a TBX file.")
+                term_pairs = tbx_extractor.extract_term_pairs(args.input_file, args.l1_lang, args.l2_lang)
+            else:
+                term_pairs = read_tab_file(args.tab_file)
+            count = build(term_pairs, args.index_file)
+            print(f"Index complete. Written {count} terms to {args.index_file}.")
+            return
+
+        with TermbaseIndex(args.index_file) as index:
+            for term in args.terms:
+                if args.prefix:
+                    results = index.lookup_prefix(term, args.limit)
+                elif args.casefold:
+                    results = index.lookup_casefold(term)
+                else:
+                    results = index.lookup(term)
+                for found_term, translations in results:
+                    print(f"{found_term}\t{translations}")
+                if not results:
+                    print(f"{term}\t(not found)", file=sys.stderr)
+
+    except FileNotFoundError as e:
+        print(f"Error: File not found. Detail: {e}", file=sys.stderr)
+        sys.exit(1)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
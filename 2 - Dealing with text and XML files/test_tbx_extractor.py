@@ -0,0 +1,65 @@
+import tbx_extractor
+
+ENTRY = """<{p}conceptEntry id="{id}">
+<{p}langSec xml:lang="en"><{p}termSec><{p}term>term {id}</{p}term></{p}termSec></{p}langSec>
+<{p}langSec xml:lang="es"><{p}termSec><{p}term>término {id}</{p}term></{p}termSec></{p}langSec>
+</{p}conceptEntry>
+"""
+
+
+def write_tbx(path, prefix='', entries=20, declare_on_body=False, trailer=''):
+    p = prefix + ':' if prefix else ''
+    declaration = 'xmlns{}="urn:iso:std:iso:30042:ed-2"'.format(':' + prefix if prefix else '')
+    root_declaration, body_declaration = ('', ' ' + declaration) if declare_on_body else (' ' + declaration, '')
+    body = ''.join(ENTRY.format(p=p, id=index) for index in range(entries))
+    # With the declaration on <body>, only the entries are in the namespace
+    outer = '' if declare_on_body else p
+    path.write_text(
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<{p}tbx type="TBX"{r}><{p}tbxHeader/><{p}text><{p}body{b}>\n{body}</{p}body></{p}text>{t}</{p}tbx>\n'.format(
+            p=outer, r=root_declaration, b=body_declaration, body=body, t=trailer),
+        encoding='utf-8'
+    )
+    return str(path)
+
+
+def extract(filepath, workers):
+    if workers == 1:
+        return list(tbx_extractor.extract_multi_term_pairs(filepath, [('en', 'es')]))
+    return list(tbx_extractor.extract_multi_term_pairs_parallel(filepath, [('en', 'es')], workers=workers,
+                                                                chunk_size=256))
+
+
+def test_parallel_same_as_serial(tmp_path):
+    filepath = write_tbx(tmp_path / 'plain.tbx')
+    assert len(tbx_extractor.split_concept_entries(filepath, 256)[2]) > 1
+    assert len(extract(filepath, 1)) == 20
+    assert extract(filepath, 2) == extract(filepath, 1)
+
+
+def test_prefixed_entries(tmp_path):
+    filepath = write_tbx(tmp_path / 'prefixed.tbx', prefix='t')
+    assert len(tbx_extractor.split_concept_entries(filepath, 256)[2]) > 1
+    assert len(extract(filepath, 1)) == 20
+    assert extract(filepath, 2) == extract(filepath, 1)
+
+
+def test_prefix_declared_below_root(tmp_path):
+    filepath = write_tbx(tmp_path / 'body.tbx', prefix='t', declare_on_body=True)
+    assert len(extract(filepath, 1)) == 20
+    assert extract(filepath, 2) == extract(filepath, 1)
+
+
+def test_last_entry_far_from_end(tmp_path):
+    filepath = write_tbx(tmp_path / 'trailer.tbx', trailer='<!--{}-->'.format('x' * (3 << 20)))
+    header, footer, chunks = tbx_extractor.split_concept_entries(filepath, 256)
+    with open(filepath, 'rb') as stream:
+        stream.seek(chunks[-1][1] - len(b'</conceptEntry>'))
+        assert stream.read(len(b'</conceptEntry>')) == b'</conceptEntry>'
+    assert extract(filepath, 2) == extract(filepath, 1)
+
+
+def test_no_entries(tmp_path):
+    filepath = write_tbx(tmp_path / 'empty.tbx', entries=0)
+    assert tbx_extractor.split_concept_entries(filepath, 256) == (b'', b'', [])
+    assert extract(filepath, 2) == []
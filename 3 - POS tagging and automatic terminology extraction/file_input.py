@@ -0,0 +1,131 @@
+"""Open plain, gzip, bz2 or xz input files transparently.
+"""
+__version__ = '0.0.2'
+
+import bz2
+import codecs
+import gzip
+import io
+import lzma
+import queue
+import threading
+from typing import (
+    BinaryIO,
+    Callable,
+    Dict,
+    Optional
+)
+
+# Magic numbers at the start of each compressed format
+MAGIC_NUMBERS = {
+    'gzip': b'\x1f\x8b',
+    'bz2': b'BZh',
+    'xz': b'\xfd7zXZ\x00',
+}
+
+OPENERS = {
+    'gzip': gzip.open,  # also reads multi-member gzip files
+    'bz2': bz2.open,    # also reads multi-stream bz2 files
+    'xz': lzma.open,
+}  # type: Dict[str, Callable[[str], BinaryIO]]
+
+CHUNK_SIZE = 1 << 20
+
+
+def detect_compression(filepath: str) -> Optional[str]:
+    """Return the compression format of filepath from its magic number, or None.
+    """
+    with open(filepath, 'rb') as stream:
+        head = stream.read(max(len(magic) for magic in MAGIC_NUMBERS.values()))
+    for compression, magic in MAGIC_NUMBERS.items():
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+class ThreadedReader(io.RawIOBase):
+    """Read a binary stream in a worker thread.
+
+    The worker reads (and so decompresses) chunks ahead while the caller is
+    parsing the previous ones. zlib, bz2 and lzma release the GIL while they
+    work, so both run at the same time.
+    """
+    def __init__(self, stream: BinaryIO, chunk_size: int = CHUNK_SIZE, max_chunks: int = 8) -> None:
+        super().__init__()
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.chunks = queue.Queue(max_chunks)  # type: queue.Queue
+        self.pending = b''
+        self.error = None  # type: Optional[BaseException]
+        # Set by close(), so the worker stops instead of reading the rest of the stream
+        self.stop = threading.Event()
+        self.worker = threading.Thread(target=self._read_ahead, daemon=True)
+        self.worker.start()
+
+    def _read_ahead(self) -> None:
+        try:
+            while not self.stop.is_set():
+                chunk = self.stream.read(self.chunk_size)
+                self.chunks.put(chunk)
+                if not chunk:
+                    break
+        except BaseException as e:
+            self.error = e
+            self.chunks.put(b'')
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if not self.pending:
+            self.pending = self.chunks.get()
+            if not self.pending:
+                # Keep returning end of file on later calls
+                self.chunks.put(b'')
+                if self.error is not None:
+                    raise self.error
+                return 0
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        return size
+
+    def close(self) -> None:
+        if not self.closed:
+            self.stop.set()
+            # Unblock the worker if it is waiting on a full queue
+            while self.worker.is_alive():
+                try:
+                    self.chunks.get_nowait()
+                except queue.Empty:
+                    self.worker.join(0.01)
+            self.stream.close()
+        super().close()
+
+
+def open_binary(filepath: str, threaded: bool = False) -> BinaryIO:
+    """Open filepath for binary reading, decompressing it on the fly if needed.
+    :param filepath: is a plain, gzip, bz2 or xz file.
+    :param threaded: decompresses in a worker thread, overlapped with the caller.
+    :return: binary file object
+    """
+    compression = detect_compression(filepath)
+    if compression is None:
+        return open(filepath, 'rb')
+
+    stream = OPENERS[compression](filepath)
+    if threaded:
+        return io.BufferedReader(ThreadedReader(stream), CHUNK_SIZE)
+    return stream
+
+
+def open_text(filepath: str, encoding: str = 'utf-8', threaded: bool = False):
+    """Open filepath for reading text line by line, decompressing it on the fly if needed.
+
+    Lines are split as with ``codecs.open(filepath, 'r', encoding=encoding)``.
+    :param filepath: is a plain, gzip, bz2 or xz file.
+    :param encoding: is the text encoding.
+    :param threaded: decompresses in a worker thread, overlapped with the caller.
+    :return: text stream reader
+    """
+    return codecs.getreader(encoding)(open_binary(filepath, threaded))
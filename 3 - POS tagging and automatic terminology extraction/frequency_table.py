@@ -0,0 +1,152 @@
+"""Memory-mapped term frequency table, e.g. of a reference corpus.
+
+The table is a single binary file:
+
+* 8 bytes magic number, then the number of slots S, the number of terms
+  and the total number of occurrences (8 bytes each, little-endian),
+* S slots of (64-bit term key, frequency), an open addressing hash table
+  with linear probing; key 0 marks an empty slot.
+
+The term keys are 64-bit BLAKE2b hashes of the UTF-8 terms, so the terms
+themselves are not stored; two terms with the same key, which is very
+unlikely, would share a frequency. A lookup reads one or a few slots of
+the memory-mapped file, so nothing is loaded into memory.
+
+Example usage:
+    python frequency_table.py build reference.freq reference-counts.txt
+    python frequency_table.py query reference.freq "action potential"
+"""
+__version__ = '0.0.1'
+
+import argparse
+import hashlib
+import mmap
+import struct
+import sys
+import term_counts
+from typing import (
+    Iterable,
+    Tuple
+)
+
+MAGIC = b'TFREQ\x00\x00\x01'
+HEADER = struct.Struct('<8sQQQ')
+SLOT = struct.Struct('<QQ')
+
+
+def term_key(term: str) -> int:
+    """Return the non-zero 64-bit key of term.
+    """
+    key = int.from_bytes(hashlib.blake2b(term.encode('utf-8'), digest_size=8).digest(), 'little')
+    return key or 1
+
+
+def build(term_frequencies: Iterable[Tuple[str, int]], table_filepath: str) -> int:
+    """Write the frequency table of term_frequencies to table_filepath.
+
+    :param term_frequencies: is an iterable of (term, frequency), e.g. Counter.items().
+    :param table_filepath: is the output table file.
+    :return: number of terms
+    """
+    frequencies = {}
+    for term, frequency in term_frequencies:
+        key = term_key(term)
+        frequencies[key] = frequencies.get(key, 0) + frequency
+
+    # At most half of the slots are used, so probes stay short
+    slot_count = 1
+    while slot_count < 2 * len(frequencies):
+        slot_count *= 2
+    slots = bytearray(SLOT.size * slot_count)
+    for key, frequency in frequencies.items():
+        slot = key & (slot_count - 1)
+        while SLOT.unpack_from(slots, SLOT.size * slot)[0]:
+            slot = (slot + 1) & (slot_count - 1)
+        SLOT.pack_into(slots, SLOT.size * slot, key, frequency)
+
+    with open(table_filepath, 'wb') as outputstream:
+        outputstream.write(HEADER.pack(MAGIC, slot_count, len(frequencies), sum(frequencies.values())))
+        outputstream.write(slots)
+
+    return len(frequencies)
+
+
+class FrequencyTable:
+    """Look up term frequencies in a table file written by ``build``.
+    """
+    def __init__(self, table_filepath: str) -> None:
+        self.stream = open(table_filepath, 'rb')
+        self.data = mmap.mmap(self.stream.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.slot_count, self.size, self.total = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError('Not a frequency table: {}'.format(table_filepath))
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __enter__(self) -> 'FrequencyTable':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.data.close()
+        self.stream.close()
+
+    def get(self, term: str) -> int:
+        """Return the frequency of term, 0 if it is not in the table.
+        """
+        key = term_key(term)
+        mask = self.slot_count - 1
+        slot = key & mask
+        while True:
+            slot_key, frequency = SLOT.unpack_from(self.data, HEADER.size + SLOT.size * slot)
+            if slot_key == key:
+                return frequency
+            if not slot_key:
+                return 0
+            slot = (slot + 1) & mask
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Builds and queries a memory-mapped term frequency table.",
+        epilog=__doc__[__doc__.index("Example usage:"):],
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Build a table from counts files (frequency<TAB>term).")
+    build_parser.add_argument("table_file", help="Output table file.")
+    build_parser.add_argument("counts_files", nargs="+",
+                              help="Counts files written by terminology-extraction.py or term_counts.py.")
+
+    query_parser = subparsers.add_parser("query", help="Look up term frequencies in a table.")
+    query_parser.add_argument("table_file", help="Table file.")
+    query_parser.add_argument("terms", nargs="+", help="Terms to look up.")
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == "build":
+            counts = term_counts.merge_count_files(args.counts_files)
+            count = build(counts.items(), args.table_file)
+            print(f"Table complete. Written {count} terms to {args.table_file}.")
+            return
+
+        with FrequencyTable(args.table_file) as table:
+            for term in args.terms:
+                print(f"{table.get(term)}\t{term}")
+
+    except FileNotFoundError as e:
+        print(f"Error: File not found. Detail: {e}", file=sys.stderr)
+        sys.exit(1)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""POS tag SRX segments with a Stanza pipeline.
+
+Tagged segments are written as ``word|POS word|POS ...``, one segment per
+line, the format read by terminology-extraction.py.
+"""
+__version__ = '0.0.2'
+
+import os
+import sys
+import time
+import stanza
+from stanza.resources.common import DEFAULT_MODEL_DIR
+from typing import (
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    TextIO
+)
+
+
+def model_available(lang: str = 'en', processors: str = 'tokenize,pos', model_dir: Optional[str] = None) -> bool:
+    """Return True if resources.json and a model for every processor of lang are in model_dir.
+    """
+    model_dir = model_dir or DEFAULT_MODEL_DIR
+    if not os.path.exists(os.path.join(model_dir, 'resources.json')):
+        return False
+    for processor in processors.split(','):
+        processor_dir = os.path.join(model_dir, lang, processor.strip())
+        if not os.path.isdir(processor_dir) or not os.listdir(processor_dir):
+            return False
+    return True
+
+
+def ensure_model(lang: str = 'en', processors: str = 'tokenize,pos', model_dir: Optional[str] = None,
+                 force_download: bool = False) -> bool:
+    """Download the model of lang only if it is missing or force_download is set.
+
+    A failed download is reported on stderr; the model may still be cached.
+    :return: True if a download was attempted
+    """
+    model_dir = model_dir or DEFAULT_MODEL_DIR
+    if not force_download and model_available(lang, processors, model_dir):
+        return False
+    try:
+        stanza.download(lang, model_dir=model_dir, processors=processors)
+    except Exception as e:
+        print(f"Error downloading the model: {e}", file=sys.stderr)
+    return True
+
+
+def load_pipeline(lang: str = 'en', processors: str = 'tokenize,pos', model_dir: Optional[str] = None,
+                  force_download: bool = False, **kwargs) -> stanza.Pipeline:
+    """Return a Stanza pipeline, downloading the model only if it is missing or force_download is set.
+
+    With a cached model the pipeline starts from the local files without
+    any network access. The startup time is reported on stderr.
+    """
+    model_dir = model_dir or DEFAULT_MODEL_DIR
+    start_time = time.perf_counter()
+
+    download = ensure_model(lang, processors, model_dir, force_download)
+    pipeline = stanza.Pipeline(lang, dir=model_dir, processors=processors,
+                               download_method=stanza.DownloadMethod.REUSE_RESOURCES, **kwargs)
+
+    elapsed = time.perf_counter() - start_time
+    source = "downloaded" if download else "cached model, no download"
+    print(f"Stanza pipeline '{lang}' ({processors}) ready in {elapsed:.1f} s ({source}).", file=sys.stderr)
+    return pipeline
+
+
+def format_document(doc: stanza.Document) -> str:
+    """Return the words of doc as ``word|POS`` separated by spaces.
+    """
+    tagged_tokens = []
+    for sentence in doc.sentences:
+        for word in sentence.words:
+            tagged_tokens.append(word.text + "|" + word.pos)
+    return " ".join(tagged_tokens)
+
+
+def tag_segment(segment_text: str, pipeline: stanza.Pipeline) -> str:
+    """Tag one segment with its own pipeline call.
+    """
+    return format_document(pipeline(segment_text))
+
+
+def tag_segments(segments: List[str], pipeline: stanza.Pipeline) -> List[str]:
+    """Tag a batch of segments with a single pipeline call.
+
+    Each segment is passed as its own Document, so the tokenizer and the
+    POS model work on the whole batch at once and every result maps back
+    to its segment.
+    :return: one tagged string per segment, in the same order
+    """
+    if not segments:
+        return []
+    docs = pipeline.bulk_process([stanza.Document([], text=segment) for segment in segments])
+    return [format_document(doc) for doc in docs]
+
+
+def iter_segments(inputstream: TextIO, segmenter) -> Iterator[str]:
+    """Yield the non empty SRX segments of every line of inputstream.
+    """
+    for linia in inputstream:
+        linia = linia.rstrip()
+        if not linia:  # Skip empty lines
+            continue
+
+        segments = segmenter.segment(linia)
+        for segment in segments[0]:
+            clean_segment = segment.strip()
+            if clean_segment:
+                yield clean_segment
+
+
+def iter_batches(items: Iterable[str], batch_size: int) -> Iterator[List[str]]:
+    """Yield lists of up to batch_size items.
+    """
+    batch = []  # type: List[str]
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def count_tokens(tagged_segment: str) -> int:
+    """Return the number of ``word|POS`` tokens of a tagged segment.
+    """
+    return len(tagged_segment.split()) if tagged_segment else 0
@@ -1,6 +1,6 @@
 """Segment text with SRX.
 """
-__version__ = '0.0.2'
+__version__ = '0.0.3'
 
 import lxml.etree
 import regex
@@ -9,7 +9,8 @@ from typing import (
     Set,
     Tuple,
     Dict,
-    Optional
+    Optional,
+    Pattern
 )
 
 
@@ -45,26 +46,181 @@ class SrxSegmenter:
         candidate_break_points = self.get_break_points()
 
         break_point = sorted(candidate_break_points - non_break_points)
-        source_text = self.source_text
+        return _split(self.source_text, break_point)
 
-        segments = []  # type: List[str]
-        whitespaces = []  # type: List[str]
-        previous_foot = ""
-        for start, end in zip([0] + break_point, break_point + [len(source_text)]):
-            segment_with_space = source_text[start:end]
-            candidate_segment = segment_with_space.strip()
-            if not candidate_segment:
-                previous_foot += segment_with_space
-                continue
 
-            head, segment, foot = segment_with_space.partition(candidate_segment)
+class CompiledSrxSegmenter:
+    """Handle segmentation with SRX rules compiled once.
+
+    Build it once per language from the output of ``parse`` and call
+    ``segment`` for every line, instead of creating a ``SrxSegmenter``
+    (and recompiling every rule) per line.
+    """
+    def __init__(self, rule: Dict[str, List[Tuple[str, Optional[str]]]]) -> None:
+        self.non_breaks = _compile(rule.get('non_breaks', []))
+        self.breaks = _compile(rule.get('breaks', []))
+
+    @staticmethod
+    def _get_break_points(patterns: List[Pattern], source_text: str) -> Set[int]:
+        return set([
+            match.span(1)[1]
+            for pattern in patterns
+            for match in pattern.finditer(source_text)
+        ])
+
+    def segment(self, source_text: str) -> Tuple[List[str], List[str]]:
+        """Return segments and whitespaces of source_text.
+        """
+        non_break_points = self._get_break_points(self.non_breaks, source_text)
+        candidate_break_points = self._get_break_points(self.breaks, source_text)
+
+        break_point = sorted(candidate_break_points - non_break_points)
+        return _split(source_text, break_point)
+
+
+class ScanSrxSegmenter(CompiledSrxSegmenter):
+    """Handle segmentation with a position-ordered scan of the SRX rules.
+
+    Break rules are few, so they are still searched one by one to find the
+    candidate break points.  The non break rules are merged into a single
+    alternation of lookbehind/lookahead pairs that is only tried at those
+    candidate points, so the text is not scanned once per non break rule.
+
+    A non break rule is checked at every candidate point, also where its
+    ``finditer`` matches would overlap (e.g. the "G. E. " in "I. G. E. "),
+    so on rare inputs it keeps together a few segments that ``extract``
+    splits.
+    """
+    def __init__(self, rule: Dict[str, List[Tuple[str, Optional[str]]]]) -> None:
+        self.breaks = _compile(rule.get('breaks', []))
+        non_breaks = rule.get('non_breaks', [])
+        self.non_break = regex.compile('|'.join(
+            '(?<={})(?={})'.format(before, after) for before, after in non_breaks
+        )) if non_breaks else None
+
+    def segment(self, source_text: str) -> Tuple[List[str], List[str]]:
+        """Return segments and whitespaces of source_text.
+        """
+        candidate_break_points = sorted(self._get_break_points(self.breaks, source_text))
+        if self.non_break is None:
+            return _split(source_text, candidate_break_points)
+
+        non_break_match = self.non_break.match
+        break_point = [
+            point for point in candidate_break_points
+            if non_break_match(source_text, point) is None
+        ]
+        return _split(source_text, break_point)
+
+
+ENGINES = {
+    'finditer': CompiledSrxSegmenter,
+    'scan': ScanSrxSegmenter,
+}
+
+
+def compile_rule(rule: Dict[str, List[Tuple[str, Optional[str]]]],
+                 engine: str = 'finditer') -> CompiledSrxSegmenter:
+    """Return a segmenter for rule using the given engine.
+    :param rule: is one language rule of the output of ``parse``.
+    :param engine: is one of ``ENGINES``.
+    :return: CompiledSrxSegmenter
+    """
+    if engine not in ENGINES:
+        raise ValueError('Unknown SRX engine: {} (use one of {})'.format(engine, ', '.join(ENGINES)))
+    return ENGINES[engine](rule)
+
+
+def _compile(regexes: List[Tuple[str, str]]) -> List[Pattern]:
+    return [regex.compile('({})({})'.format(before, after)) for before, after in regexes]
+
+
+def _split(source_text: str, break_point: List[int]) -> Tuple[List[str], List[str]]:
+    segments = []  # type: List[str]
+    whitespaces = []  # type: List[str]
+    previous_foot = ""
+    for start, end in zip([0] + break_point, break_point + [len(source_text)]):
+        segment_with_space = source_text[start:end]
+        candidate_segment = segment_with_space.strip()
+        if not candidate_segment:
+            previous_foot += segment_with_space
+            continue
+
+        head, segment, foot = segment_with_space.partition(candidate_segment)
+
+        segments.append(segment)
+        whitespaces.append('{}{}'.format(previous_foot, head))
+        previous_foot = foot
+    whitespaces.append(previous_foot)
+
+    return segments, whitespaces
+
+
+class SrxRules:
+    """Resolve language codes to the rules of an SRX file.
+
+    The ``maprules`` section is matched against a language code only the
+    first time the code is seen. The merged rule (all matching language
+    rules in map order when the header has ``cascade="yes"``, the first one
+    otherwise) and its compiled segmenter are cached, so later calls are a
+    dictionary lookup.
+    """
+    def __init__(self, srx_filepath: str) -> None:
+        tree = lxml.etree.parse(srx_filepath)
+        self.rules = _parse_languagerules(tree)
+        self.cascade, language_maps = _parse_maprules(tree)
+        self.language_maps = [
+            (regex.compile(pattern), rule_name) for pattern, rule_name in language_maps
+        ]
+        self._rule_names = {}  # type: Dict[str, List[str]]
+        self._merged_rules = {}  # type: Dict[str, Dict[str, List[Tuple[str, Optional[str]]]]]
+        self._segmenters = {}  # type: Dict[Tuple[str, str], CompiledSrxSegmenter]
+
+    def get_rule_names(self, language_code: str) -> List[str]:
+        """Return the names of the language rules applied to language_code, in cascade order.
+        """
+        rule_names = self._rule_names.get(language_code)
+        if rule_names is None:
+            rule_names = []
+            for pattern, rule_name in self.language_maps:
+                if pattern.fullmatch(language_code) is None or rule_name in rule_names:
+                    continue
+                rule_names.append(rule_name)
+                if not self.cascade:
+                    break
+            self._rule_names[language_code] = rule_names
+        return rule_names
+
+    def get_rule(self, language_code: str) -> Dict[str, List[Tuple[str, Optional[str]]]]:
+        """Return the merged rule for language_code.
+        """
+        merged_rule = self._merged_rules.get(language_code)
+        if merged_rule is None:
+            merged_rule = {
+                'breaks': [],
+                'non_breaks': [],
+            }
+            for rule_name in self.get_rule_names(language_code):
+                rule = self.rules.get(rule_name, {})
+                merged_rule['breaks'].extend(rule.get('breaks', []))
+                merged_rule['non_breaks'].extend(rule.get('non_breaks', []))
+            self._merged_rules[language_code] = merged_rule
+        return merged_rule
+
+    def get_segmenter(self, language_code: str, engine: str = 'finditer') -> CompiledSrxSegmenter:
+        """Return the compiled segmenter for language_code.
+        """
+        key = (language_code, engine)
+        segmenter = self._segmenters.get(key)
+        if segmenter is None:
+            segmenter = compile_rule(self.get_rule(language_code), engine)
+            self._segmenters[key] = segmenter
+        return segmenter
 
-            segments.append(segment)
-            whitespaces.append('{}{}'.format(previous_foot, head))
-            previous_foot = foot
-        whitespaces.append(previous_foot)
 
-        return segments, whitespaces
+NAMESPACES = {
+    'ns': 'http://www.lisa.org/srx20'
+}
 
 
 def parse(srx_filepath: str) -> Dict[str, Dict[str, List[Tuple[str, Optional[str]]]]]:
@@ -73,13 +229,37 @@ def parse(srx_filepath: str) -> Dict[str, Dict[str, List[Tuple[str, Optional[str
     :return: dict
     """
     tree = lxml.etree.parse(srx_filepath)
-    namespaces = {
-        'ns': 'http://www.lisa.org/srx20'
-    }
+    return _parse_languagerules(tree)
+
+
+def parse_maprules(srx_filepath: str) -> Tuple[bool, List[Tuple[str, str]]]:
+    """Parse the header cascade flag and the language maps of SRX file.
+    :param srx_filepath: is soruce SRX file.
+    :return: cascade flag and list of (languagepattern, languagerulename)
+    """
+    tree = lxml.etree.parse(srx_filepath)
+    return _parse_maprules(tree)
+
+
+def _parse_maprules(tree) -> Tuple[bool, List[Tuple[str, str]]]:
+    header = tree.find('ns:header', namespaces=NAMESPACES)
+    cascade = header is not None and header.attrib.get('cascade', 'no') == 'yes'
+
+    language_maps = []
+    for languagemap in tree.xpath('//ns:maprules/ns:languagemap', namespaces=NAMESPACES):
+        pattern = languagemap.attrib.get('languagepattern')
+        rule_name = languagemap.attrib.get('languagerulename')
+        if pattern is None or rule_name is None:
+            continue
+        language_maps.append((pattern, rule_name))
+
+    return cascade, language_maps
+
 
+def _parse_languagerules(tree) -> Dict[str, Dict[str, List[Tuple[str, Optional[str]]]]]:
     rules = {}
 
-    for languagerule in tree.xpath('//ns:languagerule', namespaces=namespaces):
+    for languagerule in tree.xpath('//ns:languagerule', namespaces=NAMESPACES):
         rule_name = languagerule.attrib.get('languagerulename')
         if rule_name is None:
             continue
@@ -89,14 +269,14 @@ def parse(srx_filepath: str) -> Dict[str, Dict[str, List[Tuple[str, Optional[str
             'non_breaks': [],
         }
 
-        for rule in languagerule.xpath('ns:rule', namespaces=namespaces):
+        for rule in languagerule.xpath('ns:rule', namespaces=NAMESPACES):
             is_break = rule.attrib.get('break', 'yes') == 'yes'
             rule_holder = current_rule['breaks'] if is_break else current_rule['non_breaks']
 
-            beforebreak = rule.find('ns:beforebreak', namespaces=namespaces)
+            beforebreak = rule.find('ns:beforebreak', namespaces=NAMESPACES)
             beforebreak_text = '' if beforebreak.text is None else beforebreak.text
 
-            afterbreak = rule.find('ns:afterbreak', namespaces=namespaces)
+            afterbreak = rule.find('ns:afterbreak', namespaces=NAMESPACES)
             afterbreak_text = '' if afterbreak.text is None else afterbreak.text
 
             rule_holder.append((beforebreak_text, afterbreak_text))
@@ -1,11 +1,7 @@
-import stanza
+import pos_tagger
 
-try:
-    stanza.download('en')
-except Exception as e:
-    print(f"Error downloading the model: {e}")
-
-nlp = stanza.Pipeline('en', processors='tokenize,pos')
+# Downloads the model only the first time (when it is not in the local cache)
+nlp = pos_tagger.load_pipeline('en', processors='tokenize,pos')
 text = "The quick brown fox jumps over the lazy dog."
 doc = nlp(text)
 
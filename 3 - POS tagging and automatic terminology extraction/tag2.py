@@ -1,63 +1,101 @@
-import codecs
+import os
 import sys
+import time
+import argparse
 import srx_segmenter
 import regex
-import stanza  
+import pos_tagger
+import checkpoint
+import tagged_corpus
 
-try:
-    stanza.download('en')
-except Exception as e:
-    print(f"Error downloading the model: {e}")
-
-def tag_segment(segment_text, pipeline):
-    doc = pipeline(segment_text)    
-    if not doc.sentences:
-        return ""  
-    tagged_tokens=[]
-    for sentence in doc.sentences:
-        for word in sentence.words:
-            taggedtoken=word.text+"|"+word.pos
-            tagged_tokens.append(taggedtoken)
-            
-    tagged_segment= " ".join(tagged_tokens)
-    return(tagged_segment)
-
-
-inputfilename = sys.argv[1]
-outputfilename = sys.argv[2]
+parser = argparse.ArgumentParser(
+    description="Segments a text file with SRX and POS tags each segment with Stanza (word|POS)."
+)
+parser.add_argument("inputfile", help="The input text file (plain or compressed).")
+parser.add_argument("outputfile", help="The tagged output file.")
+parser.add_argument(
+    "-b", "--batch-size",
+    type=int,
+    default=32,
+    help="Number of segments tagged with a single pipeline call (default: 32, 1 = one call per segment)."
+)
+parser.add_argument(
+    "--download",
+    action="store_true",
+    help="Download the Stanza model even if it is already in the local cache."
+)
+parser.add_argument(
+    "--resume",
+    action="store_true",
+    help="Continue an interrupted run from the checkpoint saved next to the output file."
+)
+parser.add_argument(
+    "--checkpoint-lines",
+    type=int,
+    default=1000,
+    help="Number of input lines tagged between two checkpoints (default: 1000)."
+)
+parser.add_argument(
+    "--binary",
+    action="store_true",
+    help="Write a binary tagged corpus (see tagged_corpus.py) instead of word|POS text."
+)
+args = parser.parse_args()
+if args.binary and args.resume:
+    parser.error("--resume needs a text output, a binary tagged corpus is written at the end")
+
+inputfilename = args.inputfile
+outputfilename = args.outputfile
 srxfile = "segment.srx"
-srxlang = "English"
+srxlang = "en"
 
 try:
-    rules = srx_segmenter.parse(srxfile)
+    srx = srx_segmenter.SrxRules(srxfile)
 except FileNotFoundError:
     print(f"Error: Rule file not found '{srxfile}'", file=sys.stderr)
     sys.exit(1)
+segmenter = srx.get_segmenter(srxlang)
 
-try:
-    inputstream = codecs.open(inputfilename, "r", encoding="utf-8")
-except FileNotFoundError:
+if not os.path.isfile(inputfilename):
     print(f"Error: Input file not found '{inputfilename}'", file=sys.stderr)
     sys.exit(1)
-nlp = stanza.Pipeline('en', processors='tokenize,pos')
-
-outputstream = codecs.open(outputfilename, "w", encoding="utf-8")
+nlp = pos_tagger.load_pipeline('en', processors='tokenize,pos', force_download=args.download)
 
-for linia in inputstream:
-    linia = linia.rstrip()
-    if not linia:  # Skip empty lines
-        continue
+# The checkpoint (outputfile.checkpoint) is saved after every chunk of input
+# lines whose tagged segments are on disk; a binary corpus is only written
+# at the end, so it has no checkpoints
+progress = checkpoint.Checkpoint(outputfilename)
+if args.binary:
+    corpus_writer = tagged_corpus.TaggedCorpusWriter(outputfilename)
+else:
+    outputstream = checkpoint.open_output(outputfilename, progress, args.resume)
+if progress.input_lines:
+    print(f"Resuming after input line {progress.input_lines}.", file=sys.stderr)
+lines_done = progress.input_lines
 
-    segmenter = srx_segmenter.SrxSegmenter(rules[srxlang], linia)
-    segments = segmenter.extract()
+token_count = 0
+start_time = time.perf_counter()
 
-    for segment in segments[0]:
-        clean_segment = segment.strip()
-        if clean_segment:
-            tagged_output = tag_segment(clean_segment, nlp)
+for lines, input_offset in checkpoint.iter_line_chunks(inputfilename, progress.input_offset,
+                                                        max(1, args.checkpoint_lines)):
+    segments = pos_tagger.iter_segments(lines, segmenter)
+    for batch in pos_tagger.iter_batches(segments, max(1, args.batch_size)):
+        for tagged_output in pos_tagger.tag_segments(batch, nlp):
             print(tagged_output)
-            outputstream.write(tagged_output+"\n")
-            
+            if args.binary:
+                corpus_writer.write_line(tagged_output)
+            else:
+                outputstream.write(tagged_output+"\n")
+            token_count += pos_tagger.count_tokens(tagged_output)
+    lines_done += len(lines)
+    if not args.binary:
+        progress.commit(outputstream, input_offset, lines_done)
+
+elapsed = time.perf_counter() - start_time
+print(f"Tagged {token_count} tokens in {elapsed:.1f} s ({token_count / max(elapsed, 1e-9):.0f} tokens/s).", file=sys.stderr)
 
-inputstream.close()
-outputstream.close()
+if args.binary:
+    corpus_writer.close()
+else:
+    outputstream.close()
+    progress.remove()
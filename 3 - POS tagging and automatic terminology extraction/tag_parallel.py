@@ -0,0 +1,106 @@
+import codecs
+import file_input
+import sys
+import os
+import time
+import argparse
+import multiprocessing
+import srx_segmenter
+import pos_tagger
+
+# Tags a corpus like tag2.py, with a pool of worker processes.
+# Every worker loads the SRX rules and the Stanza pipeline once, takes
+# chunks of input lines and returns their tagged segments; the chunks are
+# written in input order, so the output is the same as tag2.py's.
+# Example: python tag_parallel.py life-sciences-1K-eng.txt life-sciences-1K-eng-tagged.txt -w 4
+
+SRX_FILE = "segment.srx"
+SRX_LANG = "en"
+
+# Per worker process state, set by init_worker
+segmenter = None
+nlp = None
+batch_size = 32
+
+
+def init_worker(worker_batch_size, threads_per_worker):
+    # The model is already in the local cache: main() resolved it
+    global segmenter, nlp, batch_size
+    if threads_per_worker:
+        import torch
+        torch.set_num_threads(threads_per_worker)
+    segmenter = srx_segmenter.SrxRules(SRX_FILE).get_segmenter(SRX_LANG)
+    nlp = pos_tagger.load_pipeline('en', processors='tokenize,pos', verbose=False)
+    batch_size = worker_batch_size
+
+
+def tag_lines(lines):
+    tagged_segments = []
+    segments = pos_tagger.iter_segments(lines, segmenter)
+    for batch in pos_tagger.iter_batches(segments, batch_size):
+        tagged_segments.extend(pos_tagger.tag_segments(batch, nlp))
+    return tagged_segments
+
+
+def iter_chunks(inputstream, chunk_lines):
+    chunk = []
+    for linia in inputstream:
+        chunk.append(linia)
+        if len(chunk) >= chunk_lines:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="POS tags a text file with a pool of Stanza worker processes (same output as tag2.py)."
+    )
+    parser.add_argument("inputfile", help="The input text file (plain or compressed).")
+    parser.add_argument("outputfile", help="The tagged output file (word|POS).")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="Number of worker processes (default: number of CPUs).")
+    parser.add_argument("-c", "--chunk-lines", type=int, default=200,
+                        help="Number of input lines sent to a worker at a time (default: 200).")
+    parser.add_argument("-b", "--batch-size", type=int, default=32,
+                        help="Number of segments per Stanza call in a worker (default: 32).")
+    parser.add_argument("-t", "--threads-per-worker", type=int, default=None,
+                        help="PyTorch threads per worker (default: CPUs / workers).")
+    parser.add_argument("--download", action="store_true",
+                        help="Download the Stanza model even if it is already in the local cache.")
+    args = parser.parse_args()
+
+    workers = max(1, args.workers)
+    threads_per_worker = args.threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+
+    # Download the model once here, if missing, instead of in every worker
+    pos_tagger.ensure_model('en', 'tokenize,pos', force_download=args.download)
+    if not pos_tagger.model_available('en', 'tokenize,pos'):
+        print("Error: The Stanza model 'en' (tokenize,pos) is not available", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        inputstream = file_input.open_text(args.inputfile)
+    except FileNotFoundError:
+        print(f"Error: Input file not found '{args.inputfile}'", file=sys.stderr)
+        sys.exit(1)
+
+    token_count = 0
+    start_time = time.perf_counter()
+
+    with inputstream, codecs.open(args.outputfile, "w", encoding="utf-8") as outputstream, \
+            multiprocessing.Pool(workers, init_worker, (max(1, args.batch_size), threads_per_worker)) as pool:
+        # imap returns the chunks in input order, whatever worker finishes first
+        for tagged_segments in pool.imap(tag_lines, iter_chunks(inputstream, max(1, args.chunk_lines))):
+            for tagged_output in tagged_segments:
+                outputstream.write(tagged_output + "\n")
+                token_count += pos_tagger.count_tokens(tagged_output)
+
+    elapsed = time.perf_counter() - start_time
+    print(f"Tagged {token_count} tokens in {elapsed:.1f} s with {workers} workers "
+          f"({token_count / max(elapsed, 1e-9):.0f} tokens/s).", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""Find POS tag patterns in tagged segments in a single pass.
+
+Tagged segments are ``word|POS word|POS ...`` lines, as written by tag2.py.
+A tag pattern is a sequence of tags with optional repetition and groups::
+
+    NOUN NOUN
+    ADJ* NOUN+ (ADP NOUN)?
+    (ADJ | VERB) NOUN
+
+``*``, ``+`` and ``?`` apply to the preceding tag or group and ``|``
+separates alternatives. All the patterns are compiled into one
+deterministic automaton over tag ids, so every segment is matched in one
+pass over its tokens, whatever the number of patterns.
+
+Pattern files have one pattern per line; empty lines and lines starting
+with ``#`` are ignored.
+"""
+__version__ = '0.0.4'
+
+import codecs
+import heapq
+import regex
+from typing import (
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Sequence,
+    Set,
+    Tuple
+)
+
+TOKEN_REGEX = regex.compile(r'\s*([()|*+?]|[^\s()|*+?]+)')
+
+
+class PatternError(ValueError):
+    """A tag pattern that can not be parsed or matches an empty sequence.
+    """
+
+
+def get_form(item: str) -> str:
+    """Return the form of a ``word|POS`` token.
+    """
+    return item.split('|')[0]
+
+
+def get_tag(item: str) -> str:
+    """Return the tag of a ``word|POS`` token, empty if it has none.
+    """
+    parts = item.split('|')
+    return parts[1] if len(parts) > 1 else ''
+
+
+def read_pattern_file(pattern_filepath: str) -> List[str]:
+    """Return the patterns of a pattern file.
+    """
+    tag_patterns = []  # type: List[str]
+    with codecs.open(pattern_filepath, 'r', encoding='utf-8') as stream:
+        for line in stream:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                tag_patterns.append(line)
+    return tag_patterns
+
+
+def tokenize_pattern(tag_pattern: str) -> List[str]:
+    """Split a pattern into tags and operators.
+    """
+    return TOKEN_REGEX.findall(tag_pattern.rstrip())
+
+
+class _Nfa:
+    """Nondeterministic automaton of the patterns (Thompson construction).
+    """
+    def __init__(self) -> None:
+        self.epsilon = []  # type: List[Set[int]]
+        self.transitions = []  # type: List[Dict[str, Set[int]]]
+        # Final state of each pattern -> pattern index
+        self.accepts = {}  # type: Dict[int, int]
+
+    def new_state(self) -> int:
+        self.epsilon.append(set())
+        self.transitions.append({})
+        return len(self.epsilon) - 1
+
+    def closure(self, states: Iterable[int]) -> FrozenSet[int]:
+        """Return states and every state reachable from them without reading a tag.
+        """
+        stack = list(states)
+        reached = set(stack)
+        while stack:
+            for state in self.epsilon[stack.pop()]:
+                if state not in reached:
+                    reached.add(state)
+                    stack.append(state)
+        return frozenset(reached)
+
+
+class _PatternParser:
+    """Recursive descent parser adding one pattern to an NFA.
+
+    Every parse method returns a fragment: its (start state, end state).
+    """
+    def __init__(self, nfa: _Nfa, tag_pattern: str) -> None:
+        self.nfa = nfa
+        self.tag_pattern = tag_pattern
+        self.tokens = tokenize_pattern(tag_pattern)
+        self.position = 0
+
+    def error(self, message: str) -> PatternError:
+        return PatternError(f"{message} in tag pattern '{self.tag_pattern}'")
+
+    def peek(self) -> str:
+        return self.tokens[self.position] if self.position < len(self.tokens) else ''
+
+    def parse(self) -> Tuple[int, int]:
+        fragment = self.parse_alternatives()
+        if self.position < len(self.tokens):
+            raise self.error(f"Unexpected '{self.peek()}'")
+        return fragment
+
+    def parse_alternatives(self) -> Tuple[int, int]:
+        fragments = [self.parse_sequence()]
+        while self.peek() == '|':
+            self.position += 1
+            fragments.append(self.parse_sequence())
+        if len(fragments) == 1:
+            return fragments[0]
+        start, end = self.nfa.new_state(), self.nfa.new_state()
+        for fragment_start, fragment_end in fragments:
+            self.nfa.epsilon[start].add(fragment_start)
+            self.nfa.epsilon[fragment_end].add(end)
+        return start, end
+
+    def parse_sequence(self) -> Tuple[int, int]:
+        fragments = []  # type: List[Tuple[int, int]]
+        while self.peek() not in ('', '|', ')'):
+            fragments.append(self.parse_repetition())
+        if not fragments:
+            raise self.error("Empty sequence")
+        for (_, previous_end), (next_start, _) in zip(fragments, fragments[1:]):
+            self.nfa.epsilon[previous_end].add(next_start)
+        return fragments[0][0], fragments[-1][1]
+
+    def parse_repetition(self) -> Tuple[int, int]:
+        start, end = self.parse_atom()
+        while self.peek() in ('*', '+', '?'):
+            operator = self.tokens[self.position]
+            self.position += 1
+            new_start, new_end = self.nfa.new_state(), self.nfa.new_state()
+            self.nfa.epsilon[new_start].add(start)
+            self.nfa.epsilon[end].add(new_end)
+            if operator in ('*', '?'):
+                self.nfa.epsilon[new_start].add(new_end)
+            if operator in ('*', '+'):
+                self.nfa.epsilon[end].add(start)
+            start, end = new_start, new_end
+        return start, end
+
+    def parse_atom(self) -> Tuple[int, int]:
+        token = self.peek()
+        if token == '(':
+            self.position += 1
+            fragment = self.parse_alternatives()
+            if self.peek() != ')':
+                raise self.error("Missing ')'")
+            self.position += 1
+            return fragment
+        if token in ('', ')', '|', '*', '+', '?'):
+            raise self.error(f"Expected a tag before '{token}'" if token else "Expected a tag at the end")
+        self.position += 1
+        start, end = self.nfa.new_state(), self.nfa.new_state()
+        self.nfa.transitions[start].setdefault(token, set()).add(end)
+        return start, end
+
+
+class TagPatternMatcher:
+    """Deterministic automaton of a set of tag patterns, over tags encoded as small integers.
+
+    At every token, each pattern takes its longest match starting there.
+    As with one ``re.finditer`` per pattern on the tag string, the matches
+    of a pattern in a segment do not overlap, but matches of different
+    patterns can.
+    :raises PatternError: for a pattern with a syntax error or matching an empty sequence
+    """
+    def __init__(self, tag_patterns: Iterable[str]) -> None:
+        self.patterns = list(tag_patterns)
+        self.tag_ids = {}  # type: Dict[str, int]
+        # State 0 is the start; transitions[state] maps a tag id to the next state
+        self.transitions = []  # type: List[Dict[int, int]]
+        # Indices of the patterns matched on reaching each state
+        self.accepts = []  # type: List[Tuple[int, ...]]
+        # Bit masks of the patterns matched on reaching each state, and of
+        # the patterns that can still be matched from it
+        self.accept_masks = []  # type: List[int]
+        self.live = []  # type: List[int]
+        self._compile()
+        self._compute_live()
+
+    def _compile(self) -> None:
+        """Build an NFA of all the patterns and turn it into a DFA (subset construction).
+        """
+        nfa = _Nfa()
+        nfa_start = nfa.new_state()
+        for pattern_index, tag_pattern in enumerate(self.patterns):
+            pattern_start, pattern_end = _PatternParser(nfa, tag_pattern).parse()
+            if pattern_end in nfa.closure([pattern_start]):
+                raise PatternError(f"Tag pattern '{tag_pattern}' matches an empty sequence")
+            nfa.epsilon[nfa_start].add(pattern_start)
+            nfa.accepts[pattern_end] = pattern_index
+
+        for nfa_transitions in nfa.transitions:
+            for tag in nfa_transitions:
+                self.tag_ids.setdefault(tag, len(self.tag_ids))
+
+        # DFA state i is the set of NFA states state_sets[i]; no transition
+        # leads back to the start state, so 0 can stand for "no match"
+        state_sets = [nfa.closure([nfa_start])]
+        state_ids = {state_sets[0]: 0}  # type: Dict[FrozenSet[int], int]
+        while len(self.transitions) < len(state_sets):
+            nfa_states = state_sets[len(self.transitions)]
+            targets = {}  # type: Dict[int, Set[int]]
+            for nfa_state in nfa_states:
+                for tag, nfa_targets in nfa.transitions[nfa_state].items():
+                    targets.setdefault(self.tag_ids[tag], set()).update(nfa_targets)
+            transitions = {}  # type: Dict[int, int]
+            for tag_id, nfa_targets in targets.items():
+                target_set = nfa.closure(nfa_targets)
+                if target_set not in state_ids:
+                    state_ids[target_set] = len(state_sets)
+                    state_sets.append(target_set)
+                transitions[tag_id] = state_ids[target_set]
+            self.transitions.append(transitions)
+            self.accepts.append(tuple(sorted(nfa.accepts[nfa_state] for nfa_state in nfa_states
+                                             if nfa_state in nfa.accepts)))
+
+    def _compute_live(self) -> None:
+        """Find the patterns each state can still reach an accepting state of.
+        """
+        self.accept_masks = [sum(1 << pattern_index for pattern_index in accepts) for accepts in self.accepts]
+        self.live = list(self.accept_masks)
+        changed = True
+        while changed:
+            changed = False
+            for state, transitions in enumerate(self.transitions):
+                live = self.live[state]
+                for target in transitions.values():
+                    live |= self.live[target]
+                if live != self.live[state]:
+                    self.live[state] = live
+                    changed = True
+        # In find_ids state 0 only stands for "no match", which ends the scan
+        self.live[0] = 0
+
+    def encode(self, tags: List[str]) -> List[int]:
+        """Return the tag ids of tags, -1 for tags that are in no pattern.
+        """
+        tag_ids = self.tag_ids
+        return [tag_ids.get(tag, -1) for tag in tags]
+
+    def find(self, tags: List[str]) -> List[Tuple[int, int, int]]:
+        """Return the matches in a tag sequence as (pattern index, start, end) token indices.
+        """
+        return self.find_ids(self.encode(tags))
+
+    def find_ids(self, tag_ids: Sequence[int]) -> List[Tuple[int, int, int]]:
+        """Return the matches in a sequence of tag ids, as encoded by encode().
+
+        A pattern whose last match ends after the current start can not match
+        there, so the automaton is only run while some other pattern can
+        still be matched. A (state, position) reached by an earlier scan that
+        found no match of the active patterns from there on ends the scan
+        too, as the rest of it would be the same. Each pair is scanned again
+        only when a blocked pattern becomes active, so on a long run of
+        NOUN tags neither ``NOUN+`` nor ``NOUN+ ADP NOUN`` rescans the run.
+        """
+        transitions = self.transitions
+        accepts = self.accepts
+        accept_masks = self.accept_masks
+        live = self.live
+        start_transitions = transitions[0]
+        # Patterns that may match at the current start, i.e. whose last match
+        # ended before it, and (end, pattern index) of the other ones
+        active = (1 << len(self.patterns)) - 1
+        blocked = []  # type: List[Tuple[int, int]]
+        # (state, position) -> active patterns of a scan with no match from there on
+        dead = {}  # type: Dict[Tuple[int, int], int]
+        matches = []  # type: List[Tuple[int, int, int]]
+        for start, tag_id in enumerate(tag_ids):
+            while blocked and blocked[0][0] <= start:
+                active |= 1 << heapq.heappop(blocked)[1]
+            state = start_transitions.get(tag_id, 0)
+            if not live[state] & active:
+                continue
+            position = start + 1
+            longest = {}  # type: Dict[int, int]
+            visited = []  # type: List[Tuple[int, int]]
+            last_accept = 0
+            while live[state] & active:
+                key = (state, position)
+                dead_patterns = dead.get(key)
+                if dead_patterns is not None and not active & ~dead_patterns:
+                    break
+                visited.append(key)
+                if accept_masks[state] & active:
+                    last_accept = len(visited)
+                    for pattern_index in accepts[state]:
+                        longest[pattern_index] = position
+                if position == len(tag_ids):
+                    break
+                state = transitions[state].get(tag_ids[position], 0)
+                position += 1
+            for key in visited[last_accept:]:
+                dead[key] = active
+            for pattern_index, end in longest.items():
+                if active >> pattern_index & 1:
+                    active &= ~(1 << pattern_index)
+                    heapq.heappush(blocked, (end, pattern_index))
+                    matches.append((pattern_index, start, end))
+        return matches
+
+    def find_sequences(self, tagged_text: str) -> List[str]:
+        """Return the forms of every match in a tagged segment, joined by spaces.
+
+        The matches are grouped by pattern, in the order of the patterns, as
+        with one ``re.finditer`` per pattern; a Counter updated with them
+        then breaks the ties of most_common() in the same order.
+        """
+        items = tagged_text.split()
+        # Only the forms of the matched tokens are needed
+        matches = sorted(self.find([get_tag(item) for item in items]))
+        return [' '.join(get_form(item) for item in items[start:end]) for _, start, end in matches]
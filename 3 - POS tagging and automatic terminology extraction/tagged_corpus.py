@@ -0,0 +1,307 @@
+"""Compact, memory-mappable binary format for POS tagged corpora.
+
+A tagged corpus file stores the ``word|POS word|POS ...`` lines written by
+tag2.py as integer columns:
+
+* a header (magic number, byte order, tag id size, token, line, form and
+  tag counts, the byte offset of every section and the vocabulary sizes),
+* the form id of every token (4 bytes),
+* the tag id of every token (1 byte, or 2 bytes with more than 256 tags),
+* the index of the first token of every line, plus the total (8 bytes),
+* the form vocabulary and the tag vocabulary, UTF-8 strings separated by
+  newlines, in id order.
+
+The columns are read as memoryviews of the memory-mapped file, so
+extraction works on integer arrays without parsing or loading the text.
+
+Example usage:
+    python tagged_corpus.py encode life-sciences-1K-eng-tagged.txt life-sciences-1K-eng-tagged.tgc
+    python tagged_corpus.py decode life-sciences-1K-eng-tagged.tgc life-sciences-1K-eng-tagged.txt
+"""
+__version__ = '0.0.2'
+
+import argparse
+import array
+import codecs
+import mmap
+import shutil
+import struct
+import sys
+import tempfile
+import file_input
+from typing import (
+    Dict,
+    Iterator,
+    List,
+    Tuple
+)
+
+MAGIC = b'TAGCORP\x01'
+HEADER = struct.Struct('<8s1sB6x4Q5Q2Q')
+BYTE_ORDERS = {'little': b'<', 'big': b'>'}
+ALIGNMENT = 8
+COPY_SIZE = 1 << 20
+
+
+def is_tagged_corpus(filepath: str) -> bool:
+    """Return True if filepath is a binary tagged corpus file.
+    """
+    with open(filepath, 'rb') as stream:
+        return stream.read(len(MAGIC)) == MAGIC
+
+
+def split_token(item: str) -> Tuple[str, str]:
+    """Return the form of a ``word|POS`` token and everything after its first ``|``.
+
+    The form is that of tag_patterns.get_form(). The second part is stored
+    as the tag, and only its text up to the next ``|`` (see get_tag) is
+    matched, as tag_patterns.get_tag() does for a text token, so both
+    formats give the same candidates and a token decodes back as it was.
+    """
+    form, _, tag = item.partition('|')
+    return form, tag
+
+
+def get_tag(tag: str) -> str:
+    """Return the tag to match of a stored tag (see split_token).
+    """
+    return tag.split('|')[0]
+
+
+class TaggedCorpusWriter:
+    """Write tagged lines to a binary tagged corpus file.
+
+    The columns are buffered in temporary files and the corpus file is
+    written by close(), so memory use only depends on the vocabulary.
+    """
+    def __init__(self, filepath: str) -> None:
+        self.filepath = filepath
+        self.form_ids = {}  # type: Dict[str, int]
+        self.tag_ids = {}  # type: Dict[str, int]
+        self.token_count = 0
+        self.line_count = 0
+        self.forms_stream = tempfile.TemporaryFile()
+        self.tags_stream = tempfile.TemporaryFile()
+        self.lines_stream = tempfile.TemporaryFile()
+
+    def __enter__(self) -> 'TaggedCorpusWriter':
+        return self
+
+    def __exit__(self, exc_type, *exc_info) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._close_temporary_files()
+
+    def write_line(self, tagged_text: str) -> None:
+        """Add one ``word|POS word|POS ...`` line.
+        """
+        form_ids = self.form_ids
+        tag_ids = self.tag_ids
+        forms = array.array('I')
+        tags = array.array('H')
+        for item in tagged_text.split():
+            form, tag = split_token(item)
+            form_id = form_ids.get(form)
+            if form_id is None:
+                form_id = form_ids[form] = len(form_ids)
+            tag_id = tag_ids.get(tag)
+            if tag_id is None:
+                if len(tag_ids) > 0xFFFF:
+                    raise ValueError('More than 65536 different tags')
+                tag_id = tag_ids[tag] = len(tag_ids)
+            forms.append(form_id)
+            tags.append(tag_id)
+        self.lines_stream.write(array.array('Q', [self.token_count]).tobytes())
+        self.forms_stream.write(forms.tobytes())
+        self.tags_stream.write(tags.tobytes())
+        self.token_count += len(forms)
+        self.line_count += 1
+
+    def close(self) -> None:
+        """Write the corpus file.
+        """
+        tag_size = 1 if len(self.tag_ids) <= 0x100 else 2
+        form_vocabulary = '\n'.join(self.form_ids).encode('utf-8')
+        tag_vocabulary = '\n'.join(self.tag_ids).encode('utf-8')
+
+        sections = [
+            4 * self.token_count,
+            tag_size * self.token_count,
+            8 * (self.line_count + 1),
+            len(form_vocabulary),
+            len(tag_vocabulary),
+        ]
+        offsets = [HEADER.size]
+        for size in sections[:-1]:
+            offsets.append(_align(offsets[-1] + size))
+
+        with open(self.filepath, 'wb') as outputstream:
+            outputstream.write(HEADER.pack(MAGIC, BYTE_ORDERS[sys.byteorder], tag_size, self.token_count,
+                                           self.line_count, len(self.form_ids), len(self.tag_ids), *offsets,
+                                           len(form_vocabulary), len(tag_vocabulary)))
+            self.forms_stream.seek(0)
+            shutil.copyfileobj(self.forms_stream, outputstream, COPY_SIZE)
+            _pad(outputstream, offsets[1])
+            self.tags_stream.seek(0)
+            while True:
+                tags = self.tags_stream.read(COPY_SIZE)
+                if not tags:
+                    break
+                if tag_size == 1:
+                    tags = array.array('B', array.array('H', tags)).tobytes()
+                outputstream.write(tags)
+            _pad(outputstream, offsets[2])
+            self.lines_stream.seek(0)
+            shutil.copyfileobj(self.lines_stream, outputstream, COPY_SIZE)
+            outputstream.write(array.array('Q', [self.token_count]).tobytes())
+            _pad(outputstream, offsets[3])
+            outputstream.write(form_vocabulary)
+            _pad(outputstream, offsets[4])
+            outputstream.write(tag_vocabulary)
+        self._close_temporary_files()
+
+    def _close_temporary_files(self) -> None:
+        self.forms_stream.close()
+        self.tags_stream.close()
+        self.lines_stream.close()
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _pad(outputstream, offset: int) -> None:
+    outputstream.write(b'\x00' * (offset - outputstream.tell()))
+
+
+class TaggedCorpus:
+    """Read a binary tagged corpus file through memory-mapped integer columns.
+
+    form_ids and tag_ids hold the ids of all the tokens, line_offsets the
+    index of the first token of every line; forms and tags map the ids
+    back to strings.
+    """
+    def __init__(self, filepath: str) -> None:
+        self.stream = open(filepath, 'rb')
+        self.data = mmap.mmap(self.stream.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.data[:len(MAGIC)] != MAGIC or len(self.data) < HEADER.size:
+            self.data.close()
+            self.stream.close()
+            raise ValueError('Not a tagged corpus: {}'.format(filepath))
+        (magic, byte_order, tag_size, self.token_count, self.line_count,
+         form_count, tag_count, *offsets, form_vocabulary_size, tag_vocabulary_size) = HEADER.unpack_from(self.data, 0)
+        if byte_order != BYTE_ORDERS[sys.byteorder]:
+            self.data.close()
+            self.stream.close()
+            raise ValueError('Tagged corpus written on a machine with another byte order: {}'.format(filepath))
+
+        self.view = memoryview(self.data)
+        self.form_ids = self.view[offsets[0]:offsets[0] + 4 * self.token_count].cast('I')
+        self.tag_ids = self.view[offsets[1]:offsets[1] + tag_size * self.token_count].cast('B' if tag_size == 1 else 'H')
+        self.line_offsets = self.view[offsets[2]:offsets[2] + 8 * (self.line_count + 1)].cast('Q')
+        self.forms = _read_vocabulary(self.data[offsets[3]:offsets[3] + form_vocabulary_size], form_count)
+        self.tags = _read_vocabulary(self.data[offsets[4]:offsets[4] + tag_vocabulary_size], tag_count)
+
+    def __len__(self) -> int:
+        return self.line_count
+
+    def __enter__(self) -> 'TaggedCorpus':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        # The views must be released before the memory map can be closed
+        for view in (self.form_ids, self.tag_ids, self.line_offsets, self.view):
+            view.release()
+        self.data.close()
+        self.stream.close()
+
+    def line_span(self, index: int) -> Tuple[int, int]:
+        """Return the (start, end) token indices of line index.
+        """
+        return self.line_offsets[index], self.line_offsets[index + 1]
+
+    def iter_spans(self) -> Iterator[Tuple[int, int]]:
+        """Yield the (start, end) token indices of every line.
+        """
+        line_offsets = self.line_offsets
+        for index in range(self.line_count):
+            yield line_offsets[index], line_offsets[index + 1]
+
+    def tagged_line(self, index: int) -> str:
+        """Return line index in the ``word|POS word|POS ...`` format.
+        """
+        start, end = self.line_span(index)
+        forms = self.forms
+        tags = self.tags
+        return ' '.join(forms[form_id] + '|' + tags[tag_id]
+                        for form_id, tag_id in zip(self.form_ids[start:end], self.tag_ids[start:end]))
+
+    def iter_tagged_lines(self) -> Iterator[str]:
+        """Yield every line in the ``word|POS word|POS ...`` format.
+        """
+        for index in range(self.line_count):
+            yield self.tagged_line(index)
+
+
+def _read_vocabulary(vocabulary: bytes, count: int) -> List[str]:
+    return vocabulary.decode('utf-8').split('\n') if count else []
+
+
+def encode(text_filepath: str, corpus_filepath: str) -> Tuple[int, int]:
+    """Convert a tagged text file (plain or compressed) into a binary tagged corpus.
+
+    :return: number of lines and of tokens
+    """
+    with file_input.open_text(text_filepath) as inputstream, TaggedCorpusWriter(corpus_filepath) as writer:
+        for line in inputstream:
+            writer.write_line(line.strip())
+        return writer.line_count, writer.token_count
+
+
+def decode(corpus_filepath: str, text_filepath: str) -> int:
+    """Convert a binary tagged corpus back into a tagged text file.
+
+    :return: number of lines
+    """
+    with TaggedCorpus(corpus_filepath) as corpus, codecs.open(text_filepath, 'w', encoding='utf-8') as outputstream:
+        for tagged_line in corpus.iter_tagged_lines():
+            outputstream.write(tagged_line + "\n")
+        return len(corpus)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Converts tagged text files (word|POS) to and from binary tagged corpus files.",
+        epilog=__doc__[__doc__.index("Example usage:"):],
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    encode_parser = subparsers.add_parser("encode", help="Convert a tagged text file to a binary tagged corpus.")
+    encode_parser.add_argument("inputfile", help="Tagged text file (plain or compressed).")
+    encode_parser.add_argument("outputfile", help="Binary tagged corpus file.")
+    decode_parser = subparsers.add_parser("decode", help="Convert a binary tagged corpus to a tagged text file.")
+    decode_parser.add_argument("inputfile", help="Binary tagged corpus file.")
+    decode_parser.add_argument("outputfile", help="Tagged text file.")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "encode":
+            line_count, token_count = encode(args.inputfile, args.outputfile)
+            print(f"Encoded {line_count} lines, {token_count} tokens to {args.outputfile}.")
+        else:
+            line_count = decode(args.inputfile, args.outputfile)
+            print(f"Decoded {line_count} lines to {args.outputfile}.")
+    except FileNotFoundError as e:
+        print(f"Error: File not found. Detail: {e}", file=sys.stderr)
+        sys.exit(1)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
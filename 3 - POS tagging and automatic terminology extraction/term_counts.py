@@ -0,0 +1,190 @@
+"""Count term candidates of a tagged file in parallel and merge the counts.
+
+The tagged file is split into byte ranges at line boundaries, every worker
+process counts the pattern matches of its ranges into a Counter, and the
+Counter shards are merged pairwise (tree reduction).
+
+Counts are saved as ``frequency<TAB>term`` lines, the output format of
+terminology-extraction.py, so saved shards and outputs of different
+corpora can be merged later without rescanning the corpora::
+
+    python term_counts.py merged.txt counts-corpus1.txt counts-corpus2.txt
+"""
+__version__ = '0.0.1'
+
+import argparse
+import codecs
+import os
+import sys
+import file_input
+import tag_patterns
+import tagged_corpus
+from collections import Counter
+from typing import (
+    Iterable,
+    List,
+    Optional,
+    Tuple
+)
+
+# Per worker process state, set by init_worker
+matcher = None
+input_filepath = None
+
+
+def split_byte_ranges(filepath: str, parts: int) -> List[Tuple[int, int]]:
+    """Split a file into up to parts (start, end) byte ranges, each starting at the beginning of a line.
+    """
+    size = os.path.getsize(filepath)
+    boundaries = [0]
+    with open(filepath, 'rb') as stream:
+        for part in range(1, parts):
+            position = size * part // parts
+            if position <= boundaries[-1]:
+                continue
+            # Move to the start of the line after the one containing position-1
+            stream.seek(position - 1)
+            stream.readline()
+            boundaries.append(min(stream.tell(), size))
+    boundaries.append(size)
+    return [(start, end) for start, end in zip(boundaries, boundaries[1:]) if end > start]
+
+
+def count_terms(filepath: str, pattern_matcher: tag_patterns.TagPatternMatcher,
+                start: int = 0, end: Optional[int] = None) -> Counter:
+    """Count the term candidates of the tagged lines between byte offsets start and end.
+    """
+    counts = Counter()  # type: Counter
+    with open(filepath, 'rb') as stream:
+        stream.seek(start)
+        position = start
+        for line in stream:
+            if end is not None and position >= end:
+                break
+            position += len(line)
+            counts.update(pattern_matcher.find_sequences(line.decode('utf-8').strip()))
+    return counts
+
+
+def count_corpus_terms(corpus, pattern_matcher: tag_patterns.TagPatternMatcher, counts=None):
+    """Count the term candidates of a binary tagged corpus (tagged_corpus.TaggedCorpus).
+
+    The matcher runs on the integer tag column, the forms are only looked
+    up for the matches.
+    :param counts: optional Counter or term_sketch.SpaceSaving to add the counts to
+    :return: counts, a new Counter if not given
+    """
+    # Corpus tag id -> matcher tag id
+    tag_map = pattern_matcher.encode([tagged_corpus.get_tag(tag) for tag in corpus.tags])
+    forms = corpus.forms
+    form_ids = corpus.form_ids
+    tag_ids = corpus.tag_ids
+    if counts is None:
+        counts = Counter()
+    for start, end in corpus.iter_spans():
+        matches = pattern_matcher.find_ids([tag_map[tag_id] for tag_id in tag_ids[start:end]])
+        if matches:
+            # By pattern, then by start, as find_sequences()
+            matches.sort()
+            counts.update([' '.join([forms[form_id] for form_id in form_ids[start + match_start:start + match_end]])
+                           for _, match_start, match_end in matches])
+    return counts
+
+
+def init_worker(tag_pattern_list: List[str], filepath: str) -> None:
+    global matcher, input_filepath
+    matcher = tag_patterns.TagPatternMatcher(tag_pattern_list)
+    input_filepath = filepath
+
+
+def count_range(byte_range: Tuple[int, int]) -> Counter:
+    """Count the term candidates of one byte range of the worker's input file.
+    """
+    start, end = byte_range
+    return count_terms(input_filepath, matcher, start, end)
+
+
+def merge_pair(counters: List[Counter]) -> Counter:
+    """Merge up to two Counters, adding the second one to the first one.
+
+    The terms keep the order in which they are first seen in the file, as
+    when it is counted in one pass, so most_common() breaks ties the same way.
+    """
+    merged = counters[0]
+    for counts in counters[1:]:
+        merged.update(counts)
+    return merged
+
+
+def merge_counts(counters: List[Counter], pool=None) -> Counter:
+    """Merge Counters by pairs, level by level, until one is left.
+
+    :param pool: optional multiprocessing pool merging the pairs of a level in parallel
+    """
+    while len(counters) > 1:
+        pairs = [counters[index:index + 2] for index in range(0, len(counters), 2)]
+        counters = pool.map(merge_pair, pairs) if pool is not None else [merge_pair(pair) for pair in pairs]
+    return counters[0] if counters else Counter()
+
+
+def count_terms_parallel(filepath: str, tag_pattern_list: List[str], workers: int,
+                         ranges_per_worker: int = 4) -> Tuple[Counter, List[Counter]]:
+    """Count the term candidates of a tagged file with a pool of worker processes.
+
+    :return: the merged counts and the shard of every byte range, in file order
+    """
+    import multiprocessing
+
+    byte_ranges = split_byte_ranges(filepath, workers * ranges_per_worker)
+    with multiprocessing.Pool(workers, init_worker, (tag_pattern_list, filepath)) as pool:
+        shards = pool.map(count_range, byte_ranges)
+        # The workers merge copies of the shards, the shards stay as counted
+        total = merge_counts(shards, pool)
+    return total, shards
+
+
+def write_counts(counts: Counter, filepath: str) -> None:
+    """Write counts as ``frequency<TAB>term`` lines, most frequent first.
+    """
+    with codecs.open(filepath, 'w', encoding='utf-8') as stream:
+        for term, frequency in counts.most_common():
+            stream.write(str(frequency) + "\t" + term + "\n")
+
+
+def read_counts(filepath: str) -> Counter:
+    """Read a counts file written by write_counts or terminology-extraction.py (plain or compressed).
+    """
+    counts = Counter()  # type: Counter
+    with file_input.open_text(filepath) as stream:
+        for line in stream:
+            line = line.rstrip('\r\n')
+            if line:
+                frequency, term = line.split('\t', 1)
+                counts[term] += int(frequency)
+    return counts
+
+
+def merge_count_files(filepaths: Iterable[str]) -> Counter:
+    """Merge the counts files, in a tree reduction.
+    """
+    return merge_counts([read_counts(filepath) for filepath in filepaths])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Merges term counts files (frequency<TAB>term).")
+    parser.add_argument("outputfile", help="The merged counts file.")
+    parser.add_argument("inputfiles", nargs="+", help="Counts files to merge (plain or compressed).")
+    args = parser.parse_args()
+
+    try:
+        total = merge_count_files(args.inputfiles)
+    except FileNotFoundError as e:
+        print(f"Error: Counts file not found '{e.filename}'", file=sys.stderr)
+        sys.exit(1)
+    write_counts(total, args.outputfile)
+    print(f"Merged {len(args.inputfiles)} files: {len(total)} terms, {sum(total.values())} occurrences.",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Approximate term counting in a fixed amount of memory (Space-Saving).
+
+SpaceSaving monitors at most ``capacity`` terms. A new term that arrives
+when the summary is full replaces the term with the smallest count and
+inherits that count, recorded as its error.
+
+With N the total number of occurrences counted and k the capacity:
+
+* every monitored term has ``count - error <= true count <= count``;
+* every error, and the count of any term that is not monitored, is at
+  most the smallest monitored count, which is at most N / k;
+* so every term occurring more than N / k times is monitored, and the
+  top terms of ``most_common()`` are exact for terms much more frequent
+  than N / k.
+
+Reference: Metwally, Agrawal and El Abbadi, "Efficient Computation of
+Frequent and Top-k Elements in Data Streams", ICDT 2005.
+"""
+__version__ = '0.0.1'
+
+import heapq
+from typing import (
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union
+)
+
+# Approximate memory used by one monitored term: the dict entries of counts
+# and errors, the heap entry and a term string of ~30 characters
+BYTES_PER_TERM = 300
+
+
+def capacity_for_budget(memory_budget: int, bytes_per_term: int = BYTES_PER_TERM) -> int:
+    """Return the number of terms a SpaceSaving summary can monitor in memory_budget bytes.
+    """
+    return max(1, memory_budget // bytes_per_term)
+
+
+class SpaceSaving:
+    """Space-Saving summary of the most frequent terms, with the update/most_common interface of a Counter.
+    """
+    def __init__(self, capacity: int) -> None:
+        self.capacity = max(1, capacity)
+        self.counts = {}  # type: Dict[str, int]
+        self.errors = {}  # type: Dict[str, int]
+        # Min-heap of (count, term), one entry per monitored term; the counts
+        # in the heap can be lower than the current ones and are refreshed
+        # when an entry reaches the top
+        self.heap = []  # type: List[Tuple[int, str]]
+        self.total = 0
+
+    def add(self, term: str, count: int = 1) -> None:
+        """Count count occurrences of term.
+        """
+        self.total += count
+        counts = self.counts
+        if term in counts:
+            counts[term] += count
+            return
+        if len(counts) < self.capacity:
+            counts[term] = count
+            self.errors[term] = 0
+            heapq.heappush(self.heap, (count, term))
+            return
+
+        # Replace the monitored term with the smallest count
+        heap = self.heap
+        while True:
+            min_count, min_term = heap[0]
+            current_count = counts[min_term]
+            if current_count == min_count:
+                break
+            heapq.heapreplace(heap, (current_count, min_term))
+        del counts[min_term]
+        del self.errors[min_term]
+        counts[term] = min_count + count
+        self.errors[term] = min_count
+        heapq.heapreplace(heap, (min_count + count, term))
+
+    def update(self, terms: Union[Dict[str, int], Iterable[str]]) -> None:
+        """Count terms, given as an iterable of terms or a mapping of term counts, as Counter.update.
+        """
+        if hasattr(terms, 'items'):
+            for term, count in terms.items():
+                self.add(term, count)
+        else:
+            for term in terms:
+                self.add(term)
+
+    def error(self, term: str) -> int:
+        """Return the maximum overestimation of the count of term.
+        """
+        if term in self.errors:
+            return self.errors[term]
+        return self.min_count()
+
+    def min_count(self) -> int:
+        """Return the smallest monitored count, 0 until the summary is full.
+        """
+        if len(self.counts) < self.capacity:
+            return 0
+        return min(self.counts.values())
+
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Return the n terms with the highest estimated counts, as Counter.most_common.
+        """
+        if n is None:
+            return sorted(self.counts.items(), key=lambda item: item[1], reverse=True)
+        return heapq.nlargest(n, self.counts.items(), key=lambda item: item[1])
+
+    def __len__(self) -> int:
+        return len(self.counts)
@@ -0,0 +1,88 @@
+"""Termhood scores of term candidates: C-value and log-likelihood.
+
+C-value (Frantzi, Ananiadou and Mima 2000) favours long candidates and
+discounts the occurrences of a candidate nested in longer candidates::
+
+    C(a) = log2|a| * f(a)                                  if a is not nested
+    C(a) = log2|a| * (f(a) - sum(f(b) for b in T(a)) / |T(a)|)   otherwise
+
+where |a| is the number of words of a and T(a) the longer candidates
+containing a. The longer candidates are found by looking up every
+contiguous sub-sequence of every candidate in the candidate dict, which
+is linear in the number of candidates, instead of comparing all pairs.
+
+Log-likelihood (Rayson and Garside 2000) compares the frequency of a
+candidate with its frequency in a reference corpus, usually looked up in
+a frequency_table.FrequencyTable. It is signed: negative when the
+candidate is relatively more frequent in the reference corpus.
+"""
+__version__ = '0.0.1'
+
+import math
+from typing import (
+    Dict,
+    List,
+    Mapping
+)
+
+
+def nested_frequencies(counts: Mapping[str, int]) -> Dict[str, List[int]]:
+    """Return, for every candidate nested in longer candidates, [number of them, sum of their frequencies].
+    """
+    nested = {}  # type: Dict[str, List[int]]
+    for term, frequency in counts.items():
+        words = term.split(' ')
+        length = len(words)
+        found = set()
+        for size in range(1, length):
+            for start in range(length - size + 1):
+                subterm = ' '.join(words[start:start + size])
+                if subterm in counts and subterm not in found:
+                    found.add(subterm)
+                    statistics = nested.setdefault(subterm, [0, 0])
+                    statistics[0] += 1
+                    statistics[1] += frequency
+    return nested
+
+
+def c_values(counts: Mapping[str, int]) -> Dict[str, float]:
+    """Return the C-value of every candidate of counts (term -> frequency).
+
+    One word candidates get 0, as log2(1) = 0.
+    """
+    nested = nested_frequencies(counts)
+    scores = {}  # type: Dict[str, float]
+    for term, frequency in counts.items():
+        weight = math.log2(term.count(' ') + 1)
+        if term in nested:
+            longer_count, longer_frequency = nested[term]
+            frequency -= longer_frequency / longer_count
+        scores[term] = weight * frequency
+    return scores
+
+
+def log_likelihood(frequency: int, reference_frequency: int, total: int, reference_total: int) -> float:
+    """Return the signed log-likelihood of a frequency in a corpus of total words against a reference corpus.
+    """
+    expected = total * (frequency + reference_frequency) / (total + reference_total)
+    reference_expected = reference_total * (frequency + reference_frequency) / (total + reference_total)
+    score = 0.0
+    if frequency:
+        score += frequency * math.log(frequency / expected)
+    if reference_frequency:
+        score += reference_frequency * math.log(reference_frequency / reference_expected)
+    score *= 2
+    return score if frequency * reference_total >= reference_frequency * total else -score
+
+
+def log_likelihoods(counts: Mapping[str, int], reference) -> Dict[str, float]:
+    """Return the log-likelihood of every candidate of counts against a reference.
+
+    :param reference: has get(term) -> frequency and total, e.g. a frequency_table.FrequencyTable
+    """
+    total = sum(counts.values())
+    reference_total = reference.total
+    return {
+        term: log_likelihood(frequency, reference.get(term), total, reference_total)
+        for term, frequency in counts.items()
+    }
@@ -1,41 +1,131 @@
-import re
 from collections import Counter
+import os
 import sys
+import argparse
+import tag_patterns
+import term_counts
+import term_sketch
+import termhood
+import tagged_corpus
+import frequency_table
 
-def find_patterns(tagged_text, tag_patterns):
-    tags = ' '.join(item.split('|')[1] for item in tagged_text.split())
-    forms = [item.split('|')[0] for item in tagged_text.split()]
-    found_sequences = []
-    for tag_pattern in tag_patterns:
-        reggex_pattern = re.compile(tag_pattern.replace(' ', r'\s+'))
-        for match in reggex_pattern.finditer(tags):
-            start, end = match.span()
-            index_start_form = tags[:start].count(' ')
-            index_end_form = index_start_form + tag_pattern.count(' ') + 1
-            seq_forms = forms[index_start_form:index_end_form]
-            found_sequences.append(' '.join(seq_forms))
+def find_patterns(tagged_text, matcher):
+    found_sequences = matcher.find_sequences(tagged_text)
     frequency = Counter(found_sequences)
     return dict(frequency)
     
 
-patterns = ["NOUN NOUN","NOUN NOUN NOUN","ADJ NOUN","ADJ ADJ NOUN"]
+def main():
+    parser = argparse.ArgumentParser(description="Counts the term candidates of a POS tagged file (word|POS).")
+    parser.add_argument("inputfile", help="The tagged input file, text or binary (see tagged_corpus.py).")
+    parser.add_argument("outputfile", help="The output file (frequency<TAB>term).")
+    parser.add_argument("patternfile", nargs="?", default="patterns-en.txt",
+                        help="The POS pattern file (default: patterns-en.txt).")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="Number of worker processes counting byte ranges of the input (default: 1).")
+    parser.add_argument("--shards", metavar="DIR",
+                        help="Also save the counts of every byte range in DIR, to merge them later with term_counts.py.")
+    parser.add_argument("--memory-budget", type=float, metavar="MB",
+                        help="Approximate counting (Space-Saving) in about MB megabytes instead of exact counts.")
+    parser.add_argument("-n", "--top", type=int, default=None,
+                        help="Only output the N most frequent terms (default: all).")
+    parser.add_argument("-s", "--score", choices=("frequency", "c-value", "log-likelihood"), default="frequency",
+                        help="Rank the terms by frequency (default), C-value or log-likelihood against --reference; "
+                             "with a score the output lines are score<TAB>frequency<TAB>term.")
+    parser.add_argument("-r", "--reference", metavar="TABLE",
+                        help="Frequency table of a reference corpus (built with frequency_table.py), for log-likelihood.")
+    args = parser.parse_args()
+    if args.score == "log-likelihood" and not args.reference:
+        parser.error("--score log-likelihood needs a --reference frequency table")
+    if args.memory_budget is not None and args.workers > 1:
+        parser.error("--memory-budget counts in a single process, it can not be used with --workers")
 
-inputfile=sys.argv[1]
-outputfile=sys.argv[2]
+    inputfile=args.inputfile
+    outputfile=args.outputfile
+    patternfile=args.patternfile
 
-total_frequency = Counter()
+    try:
+        patterns = tag_patterns.read_pattern_file(patternfile)
+        matcher = tag_patterns.TagPatternMatcher(patterns)
+    except FileNotFoundError:
+        print(f"Error: Pattern file not found '{patternfile}'", file=sys.stderr)
+        sys.exit(1)
+    except tag_patterns.PatternError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
 
-inputstream=open(inputfile, 'r', encoding='utf-8')
-outputstream=open(outputfile, 'w', encoding='utf-8')
+    if not os.path.isfile(inputfile):
+        print(f"Error: Input file not found '{inputfile}'", file=sys.stderr)
+        sys.exit(1)
+
+    binary_input = tagged_corpus.is_tagged_corpus(inputfile)
+    if binary_input and args.workers > 1:
+        print("Error: --workers splits tagged text files, not binary tagged corpora", file=sys.stderr)
+        sys.exit(1)
+
+    if args.workers > 1:
+        # Map: count byte ranges in the workers; reduce: merge the Counters pairwise
+        total_frequency, shards = term_counts.count_terms_parallel(inputfile, patterns, args.workers)
+    else:
+        if args.memory_budget is not None:
+            # Fixed memory: the counts are estimates, see term_sketch for the error bounds
+            capacity = term_sketch.capacity_for_budget(int(args.memory_budget * 1024 * 1024))
+            total_frequency = term_sketch.SpaceSaving(capacity)
+        else:
+            total_frequency = Counter()
+
+        if binary_input:
+            # Integer columns: no line or token parsing
+            with tagged_corpus.TaggedCorpus(inputfile) as corpus:
+                term_counts.count_corpus_terms(corpus, matcher, total_frequency)
+        else:
+            inputstream=open(inputfile, 'r', encoding='utf-8')
+
+            for line in inputstream:
+                tagged_sentence = line.strip()
+                line_frequencies = find_patterns(tagged_sentence, matcher)
+                total_frequency.update(line_frequencies)
+            inputstream.close()
+        shards = [total_frequency]
+
+    if args.shards:
+        os.makedirs(args.shards, exist_ok=True)
+        for index, shard in enumerate(shards):
+            term_counts.write_counts(shard, os.path.join(args.shards, f"shard-{index:04d}.txt"))
+
+    outputstream=open(outputfile, 'w', encoding='utf-8')
+
+    if args.score != "frequency":
+        counts = dict(total_frequency.most_common())
+        if args.score == "c-value":
+            scores = termhood.c_values(counts)
+        else:
+            try:
+                with frequency_table.FrequencyTable(args.reference) as reference:
+                    scores = termhood.log_likelihoods(counts, reference)
+            except (FileNotFoundError, ValueError) as e:
+                print(f"Error: Reference frequency table: {e}", file=sys.stderr)
+                sys.exit(1)
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:args.top]
+        for term, score in ranked:
+            scoredterm=f"{score:.3f}\t{counts[term]}\t{term}"
+            print(scoredterm)
+            outputstream.write(scoredterm+"\n")
+        outputstream.close()
+        return
+
+    sorted_results = total_frequency.most_common(args.top)
+    if args.memory_budget is not None:
+        print(f"Approximate counts of {total_frequency.total} occurrences, {len(total_frequency)} of "
+              f"{total_frequency.capacity} terms monitored; counts are at most {total_frequency.min_count()} "
+              f"too high.", file=sys.stderr)
+
+    for term in sorted_results:
+        freqterm=str(term[1])+"\t"+term[0]
+        print(freqterm)
+        outputstream.write(freqterm+"\n")
+    outputstream.close()
 
-for line in inputstream:
-    tagged_sentence = line.strip()
-    line_frequencies = find_patterns(tagged_sentence, patterns)
-    total_frequency.update(line_frequencies)
-    
-sorted_results = total_frequency.most_common()
 
-for term in sorted_results:
-    freqterm=str(term[1])+"\t"+term[0]
-    print(freqterm)
-    outputstream.write(freqterm+"\n")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import random
+import tag_patterns
+
+PATTERNS = ['ADJ* NOUN+ (ADP NOUN)?', 'NOUN NOUN', 'NOUN+ VERB', '(ADJ | VERB) NOUN', 'NOUN', 'NOUN+ ADP NOUN']
+TAGS = ['NOUN', 'ADJ', 'ADP', 'VERB', 'DET']
+
+
+def find_all_longest(matcher, tags):
+    # Longest match of every pattern at every start, skipping the overlapping ones
+    matches = []
+    for pattern_index, tag_pattern in enumerate(matcher.patterns):
+        single = tag_patterns.TagPatternMatcher([tag_pattern])
+        tag_ids = single.encode(tags)
+        last_end = 0
+        for start in range(len(tags)):
+            ends = [end for end in range(start + 1, len(tags) + 1)
+                    if start >= last_end and single.accepts[_run(single, tag_ids[start:end])]]
+            if ends:
+                last_end = max(ends)
+                matches.append((pattern_index, start, last_end))
+    return sorted(matches, key=lambda match: (match[1], match[0]))
+
+
+def _run(matcher, tag_ids):
+    state = 0
+    for tag_id in tag_ids:
+        state = matcher.transitions[state].get(tag_id, 0)
+        if not state:
+            break
+    return state
+
+
+def test_matches():
+    matcher = tag_patterns.TagPatternMatcher(PATTERNS)
+    assert sorted(matcher.find(['ADJ', 'NOUN', 'NOUN', 'ADP', 'NOUN', 'VERB'])) == [
+        (0, 0, 5), (1, 1, 3), (2, 4, 6), (3, 0, 2), (4, 1, 2), (4, 2, 3), (4, 4, 5), (5, 1, 5)
+    ]
+    generator = random.Random(1)
+    for _ in range(500):
+        tags = [generator.choice(TAGS) for _ in range(generator.randint(0, 20))]
+        found = sorted(matcher.find(tags), key=lambda match: (match[1], match[0]))
+        assert found == find_all_longest(matcher, tags)
+
+
+class CountingIds(list):
+    """Tag ids counting the transitions of find_ids, which reads the next tag id by index.
+    """
+    reads = 0
+
+    def __getitem__(self, index):
+        self.reads += 1
+        return list.__getitem__(self, index)
+
+
+def count_transitions(matcher, tags):
+    tag_ids = CountingIds(matcher.encode(tags))
+    matches = matcher.find_ids(tag_ids)
+    return matches, tag_ids.reads
+
+
+def test_long_runs_scale_linearly():
+    length = 5000
+    # NOUN+ matches the whole run, the others scan it without completing a match
+    for tag_pattern, expected in (('ADJ* NOUN+ (ADP NOUN)?', [(0, 0, length)]),
+                                  ('NOUN+ ADP NOUN', []), ('NOUN+ VERB', [])):
+        matcher = tag_patterns.TagPatternMatcher([tag_pattern])
+        matches, transitions = count_transitions(matcher, ['NOUN'] * length)
+        assert matches == expected
+        # A quadratic scan would make about length ** 2 / 2 transitions
+        assert transitions <= len(matcher.transitions) * length
+
+    matcher = tag_patterns.TagPatternMatcher(PATTERNS)
+    matches, transitions = count_transitions(matcher, ['NOUN'] * length)
+    assert transitions <= len(matcher.transitions) * length
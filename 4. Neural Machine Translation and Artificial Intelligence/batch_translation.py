@@ -0,0 +1,37 @@
+"""Translate segments in batches of similar length with a translation pipeline.
+
+The segments of many lines are sorted by length and cut into buckets of
+batch_size segments, so each call to the model pads its batch to a length
+close to that of all its sentences. The translations are returned in the
+order of the segments, to rebuild every line with its original whitespace.
+"""
+__version__ = '0.0.1'
+
+from typing import (
+    Iterator,
+    List,
+    Sequence
+)
+
+
+def iter_buckets(segments: Sequence[str], batch_size: int) -> Iterator[List[int]]:
+    """Yield lists of up to batch_size segment indices, from the shortest segments to the longest.
+    """
+    order = sorted(range(len(segments)), key=lambda index: len(segments[index]))
+    for start in range(0, len(order), batch_size):
+        yield order[start:start + batch_size]
+
+
+def translate_segments(segments: Sequence[str], translator, batch_size: int = 16) -> List[str]:
+    """Translate segments with one translator call per length bucket.
+
+    :param translator: is a transformers translation pipeline
+    :return: one translation per segment, in the same order
+    """
+    batch_size = max(1, batch_size)
+    translations = [''] * len(segments)
+    for bucket in iter_buckets(segments, batch_size):
+        results = translator([segments[index] for index in bucket], batch_size=len(bucket))
+        for index, result in zip(bucket, results):
+            translations[index] = result['translation_text']
+    return translations
@@ -0,0 +1,141 @@
+"""Compare the fp32 and the int8 quantized translation models on a text file.
+
+Every model runs in its own process, so the peak RSS reported is that of
+the model alone. The int8 model runs twice with a new, empty cache
+directory: the first run loads the fp32 model, quantizes it and saves its
+weights, the second one builds the int8 model from the cached weights
+without converting it again. For each run the script reports the load time,
+the translation time per segment and the peak RSS, and for the int8
+model the agreement of its translations with the fp32 ones: exact
+matches and mean word similarity (difflib ratio of the word sequences).
+
+Example usage:
+    python benchmark_quantization.py text.txt
+    python benchmark_quantization.py text.txt -b 1 -t 4
+"""
+import argparse
+import difflib
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import batch_translation
+import parallel_translation
+import quantized_translation
+import srx_segmenter
+from typing import (
+    List
+)
+
+MODEL_NAME = "Helsinki-NLP/opus-mt-en-es"
+
+
+def read_segments(inputfilename: str) -> List[str]:
+    segmenter = srx_segmenter.SrxRules(parallel_translation.SRX_FILE).get_segmenter(parallel_translation.SRX_LANG)
+    segments = []
+    with open(inputfilename, encoding='utf-8') as entrada:
+        for linia in entrada:
+            segments.extend(segment for segment in segmenter.segment(linia.rstrip())[0] if segment.strip())
+    return segments
+
+
+def run_model(args) -> None:
+    """Translate the segments with one model and print the measures as JSON.
+    """
+    if args.threads:
+        parallel_translation.set_threads(args.threads)
+    segments = read_segments(args.inputfile)
+    start_time = time.perf_counter()
+    translator = quantized_translation.load_translator(args.model, args.run == "int8", args.quantized_cache)
+    load_seconds = time.perf_counter() - start_time
+
+    # The first call is slower, it is not counted
+    translator(segments[:1])
+    start_time = time.perf_counter()
+    translations = []
+    for repetition in range(args.repeat):
+        translations = batch_translation.translate_segments(segments, translator, args.batch_size)
+    translate_seconds = (time.perf_counter() - start_time) / args.repeat
+
+    json.dump({
+        "load_seconds": load_seconds,
+        "translate_seconds": translate_seconds,
+        # ru_maxrss is in kilobytes on Linux
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "translations": translations
+    }, sys.stdout, ensure_ascii=False)
+
+
+def word_similarity(translation: str, reference: str) -> float:
+    return difflib.SequenceMatcher(None, translation.split(), reference.split()).ratio()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compares latency, RSS and translations of the fp32 and the int8 quantized models.",
+        epilog=__doc__[__doc__.index("Example usage:"):],
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("inputfile", help="The input text file.")
+    parser.add_argument("-m", "--model", default=MODEL_NAME, help=f"Translation model (default: {MODEL_NAME}).")
+    parser.add_argument("-b", "--batch-size", type=int, default=16,
+                        help="Number of segments per model call (default: 16, 1 for the latency of single segments).")
+    parser.add_argument("-t", "--threads", type=int, default=None,
+                        help="PyTorch threads (default: PyTorch's choice).")
+    parser.add_argument("-r", "--repeat", type=int, default=3,
+                        help="Number of times the segments are translated, the time is the mean (default: 3).")
+    parser.add_argument("--run", choices=["fp32", "int8"], help=argparse.SUPPRESS)
+    parser.add_argument("--quantized-cache", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    args.repeat = max(1, args.repeat)
+
+    if not os.path.isfile(args.inputfile):
+        print(f"Error: Input file not found '{args.inputfile}'", file=sys.stderr)
+        sys.exit(1)
+    if args.run:
+        run_model(args)
+        return
+
+    segments = read_segments(args.inputfile)
+    runs = [("fp32", "fp32"), ("int8", "int8 (quantized now)"), ("int8", "int8 (cached)")]
+    results = []
+    # Not the scripts' cache, where the first int8 run would find the weights already converted
+    with tempfile.TemporaryDirectory() as quantized_cache:
+        for run, label in runs:
+            command = [sys.executable, os.path.abspath(__file__), args.inputfile, "--run", run, "-m", args.model,
+                       "-b", str(args.batch_size), "-r", str(args.repeat), "--quantized-cache", quantized_cache]
+            if args.threads:
+                command += ["-t", str(args.threads)]
+            process = subprocess.run(command, stdout=subprocess.PIPE)
+            if process.returncode != 0:
+                print(f"Error: The {label} run failed", file=sys.stderr)
+                sys.exit(1)
+            results.append((label, json.loads(process.stdout.decode('utf-8'))))
+
+    reference = results[0][1]["translations"]
+    print(f"{len(segments)} segments of {args.inputfile}, batch size {args.batch_size}, {args.repeat} repetitions")
+    print(f"{'model':22}{'load s':>9}{'ms/segment':>12}{'speedup':>9}{'max RSS MB':>12}{'exact':>8}{'words':>8}")
+    for label, result in results:
+        translations = result["translations"]
+        exact = sum(translation == expected for translation, expected in zip(translations, reference))
+        similarity = sum(map(word_similarity, translations, reference))
+        print(f"{label:22}{result['load_seconds']:9.2f}"
+              f"{1000 * result['translate_seconds'] / max(1, len(segments)):12.1f}"
+              f"{results[0][1]['translate_seconds'] / max(result['translate_seconds'], 1e-9):9.2f}"
+              f"{result['max_rss_mb']:12.0f}"
+              f"{exact / max(1, len(segments)):8.1%}{similarity / max(1, len(segments)):8.1%}")
+
+    print()
+    for source, expected, translation in zip(segments, reference, results[-1][1]["translations"]):
+        if translation != expected:
+            print(source)
+            print(f"fp32: {expected}")
+            print(f"int8: {translation}")
+            print("-------------------------")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Checkpoints to resume the processing of large files.
+"""
+__version__ = '0.0.1'
+
+import codecs
+import json
+import os
+import file_input
+from typing import (
+    Iterator,
+    List,
+    Tuple
+)
+
+
+class Checkpoint:
+    """Record how far a job got, in a file next to its output file.
+
+    The checkpoint holds the byte offset of the first input line not yet
+    processed, the number of input lines done and the size of the output
+    written for them. It is only saved after the output has been flushed
+    to disk, so output past output_offset was not committed.
+    """
+    def __init__(self, output_filepath: str, suffix: str = '.checkpoint') -> None:
+        self.filepath = output_filepath + suffix
+        self.input_offset = 0
+        self.input_lines = 0
+        self.output_offset = 0
+
+    def load(self) -> bool:
+        """Read the checkpoint file, return False if there is none.
+        """
+        try:
+            with open(self.filepath, 'r', encoding='utf-8') as stream:
+                state = json.load(stream)
+        except FileNotFoundError:
+            return False
+        self.input_offset = state['input_offset']
+        self.input_lines = state['input_lines']
+        self.output_offset = state['output_offset']
+        return True
+
+    def save(self, input_offset: int, input_lines: int, output_offset: int) -> None:
+        """Write the checkpoint file atomically.
+        """
+        self.input_offset = input_offset
+        self.input_lines = input_lines
+        self.output_offset = output_offset
+        temporary_filepath = self.filepath + '.tmp'
+        with open(temporary_filepath, 'w', encoding='utf-8') as stream:
+            json.dump({
+                'input_offset': input_offset,
+                'input_lines': input_lines,
+                'output_offset': output_offset,
+            }, stream)
+            stream.flush()
+            os.fsync(stream.fileno())
+        os.replace(temporary_filepath, self.filepath)
+
+    def commit(self, outputstream, input_offset: int, input_lines: int) -> None:
+        """Flush outputstream to disk and save the checkpoint after input_lines lines.
+        """
+        outputstream.flush()
+        os.fsync(outputstream.fileno())
+        self.save(input_offset, input_lines, outputstream.tell())
+
+    def remove(self) -> None:
+        """Delete the checkpoint file, once the job is complete.
+        """
+        if os.path.exists(self.filepath):
+            os.remove(self.filepath)
+
+
+def open_output(output_filepath: str, checkpoint: Checkpoint, resume: bool = False):
+    """Open the output file, for a new job or to continue from checkpoint.
+
+    With resume and a saved checkpoint, the output is cut back to the last
+    committed size and new output is appended; otherwise it is overwritten.
+    """
+    if resume and checkpoint.load() and os.path.exists(output_filepath):
+        outputstream = codecs.open(output_filepath, "r+", encoding="utf-8")
+        outputstream.seek(checkpoint.output_offset)
+        outputstream.truncate()
+        return outputstream
+
+    checkpoint.input_offset = checkpoint.input_lines = checkpoint.output_offset = 0
+    return codecs.open(output_filepath, "w", encoding="utf-8")
+
+
+def iter_line_chunks(input_filepath: str, start_offset: int = 0,
+                     chunk_lines: int = 1000, encoding: str = 'utf-8') -> Iterator[Tuple[List[str], int]]:
+    """Yield chunks of lines of the input file with the byte offset just after each chunk.
+
+    Reading starts at start_offset (a checkpoint's input_offset). Lines are
+    split as with ``codecs.open``, and compressed inputs are supported.
+    :return: iterator of (lines, offset of the next line)
+    """
+    with file_input.open_binary(input_filepath) as stream:
+        if start_offset:
+            stream.seek(start_offset)
+        offset = start_offset
+        lines = []  # type: List[str]
+        for raw_line in stream:
+            offset += len(raw_line)
+            lines.extend(raw_line.decode(encoding).splitlines(keepends=True))
+            if len(lines) >= chunk_lines:
+                yield lines, offset
+                lines = []
+        if lines:
+            yield lines, offset
@@ -0,0 +1,104 @@
+"""Translate chunks of SRX segmented lines, in this process or in a pool of worker processes.
+
+Every worker process loads its own copy of the model and uses a fixed
+number of PyTorch threads, pinned to its own CPU cores where the system
+allows it, so the workers do not compete for the same cores.
+"""
+__version__ = '0.0.2'
+
+import os
+import batch_translation
+import quantized_translation
+import srx_segmenter
+import translation_cache
+import translation_client
+from typing import (
+    List,
+    Optional,
+    Tuple
+)
+
+SRX_FILE = "segment.srx"
+SRX_LANG = "en"
+
+# Per worker process state, set by init_worker
+segmenter = None
+translator = None
+cache = None
+batch_size = 16
+
+
+def translate_lines(lines: List[str], line_segmenter, line_translator,
+                    line_cache: translation_cache.TranslationCache,
+                    segment_batch_size: int) -> Tuple[List[str], List[Tuple[str, str]]]:
+    """Translate lines, with the segments of all the lines batched together.
+
+    :return: the translated lines, with the whitespace between segments kept,
+             and the (segment, translation) pairs
+    """
+    segmented = [line_segmenter.segment(linia.rstrip()) for linia in lines]
+    sources = [segment for segments in segmented for segment in segments[0]]
+    translations = line_cache.translate(
+        sources, lambda missing: batch_translation.translate_segments(missing, line_translator, segment_batch_size)
+    )
+    translated_lines = []
+    position = 0
+    for segments, whitespace in segmented:
+        # whitespace[i] is the whitespace before segment i, the last one ends the line
+        liniatrad = [whitespace[0]]
+        for index in range(len(segments)):
+            liniatrad.append(translations[position])
+            liniatrad.append(whitespace[index + 1])
+            position += 1
+        translated_lines.append("".join(liniatrad))
+    return translated_lines, list(zip(sources, translations))
+
+
+def cache_model_name(model_name: str, quantize: bool) -> str:
+    """Return the model name of the translation cache, which keeps quantized translations apart.
+    """
+    return f"{model_name} (int8)" if quantize else model_name
+
+
+def set_threads(threads: int, worker_index: Optional[int] = None) -> List[int]:
+    """Set the number of PyTorch threads and pin worker worker_index to its own threads cores.
+
+    :return: the cores the process is pinned to, empty if it is not pinned
+    """
+    import torch
+    torch.set_num_threads(threads)
+    if worker_index is None or not hasattr(os, 'sched_setaffinity'):
+        return []
+    cpus = sorted(os.sched_getaffinity(0))
+    cores = sorted({cpus[(worker_index * threads + offset) % len(cpus)] for offset in range(threads)})
+    os.sched_setaffinity(0, cores)
+    return cores
+
+
+def init_worker(model_name: str, cache_filepath: Optional[str], cache_size: int, worker_batch_size: int,
+                threads_per_worker: int, worker_counter, quantize: bool = False,
+                quantized_cache: str = quantized_translation.DEFAULT_CACHE_DIR) -> None:
+    global segmenter, translator, cache, batch_size
+    with worker_counter.get_lock():
+        worker_index = worker_counter.value
+        worker_counter.value += 1
+    set_threads(threads_per_worker, worker_index)
+    segmenter = srx_segmenter.SrxRules(SRX_FILE).get_segmenter(SRX_LANG)
+    translator = translation_client.get_translator(model_name, quantize=quantize, quantized_cache=quantized_cache)
+    cache = translation_cache.TranslationCache(cache_model_name(model_name, quantize), cache_filepath, cache_size)
+    batch_size = worker_batch_size
+
+
+def translate_chunk(chunk: Tuple[List[str], int]) -> Tuple[List[str], List[Tuple[str, str]], int, Tuple[int, int, int]]:
+    """Translate a chunk of lines in a worker.
+
+    :param chunk: is (lines, input offset after the lines), as from checkpoint.iter_line_chunks
+    :return: the translated lines, the (segment, translation) pairs, the input offset and
+             the (memory hits, disk hits, misses) of the worker's cache for the chunk
+    """
+    lines, input_offset = chunk
+    counters = (cache.memory_hits, cache.disk_hits, cache.misses)
+    translated_lines, pairs = translate_lines(lines, segmenter, translator, cache, batch_size)
+    cache.commit()
+    return translated_lines, pairs, input_offset, (cache.memory_hits - counters[0], cache.disk_hits - counters[1],
+                                                   cache.misses - counters[2])
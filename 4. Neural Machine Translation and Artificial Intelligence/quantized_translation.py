@@ -0,0 +1,112 @@
+"""Load a translation model with int8 dynamic quantization of its linear layers, for CPU.
+
+The weights of every torch.nn.Linear layer are converted to int8, and
+their activations are quantized on the fly at each call, which makes the
+model smaller and faster on CPU. The state_dict of the quantized model is
+saved in a cache directory. Later startups neither load the fp32 weights
+nor convert them: they build the model from its configuration without
+weights, with empty int8 linear layers, and load the cached state_dict
+into it. The cache holds tensors only, read with ``weights_only=True``,
+and its files are named after the torch and transformers versions that
+wrote them.
+"""
+__version__ = '0.0.3'
+
+import itertools
+import os
+import re
+import warnings
+
+# Next to the scripts, wherever they are run from
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "quantized-models")
+
+
+def quantized_model_path(model_name: str, cache_dir: str = DEFAULT_CACHE_DIR) -> str:
+    """Return the file of the cached quantized weights of model_name.
+    """
+    import torch
+    import transformers
+    name = re.sub(r'[^\w.-]+', '--', model_name).strip('-')
+    return os.path.join(cache_dir,
+                        f"{name}-int8-state-torch{torch.__version__}-transformers{transformers.__version__}.pt")
+
+
+def quantize_model(model):
+    """Return model with its linear layers quantized to int8 (dynamic quantization).
+    """
+    import torch
+    # Eager mode quantization is deprecated in recent PyTorch versions, but still works
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return torch.ao.quantization.quantize_dynamic(model.eval(), {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def build_quantized_model(model_name: str):
+    """Return model_name with empty int8 linear layers, without loading or initializing its fp32 weights.
+    """
+    import torch
+    from torch.ao.nn.quantized.dynamic import Linear as QuantizedLinear
+    from transformers import AutoConfig, AutoModelForSeq2SeqLM, GenerationConfig
+    # On the meta device the layers have no storage, and their initialization does nothing
+    with torch.device('meta'):
+        model = AutoModelForSeq2SeqLM.from_config(AutoConfig.from_pretrained(model_name))
+    # The same layers quantize_dynamic replaces: torch.nn.Linear itself, not its subclasses
+    for module in list(model.modules()):
+        for name, child in list(module.named_children()):
+            if type(child) is torch.nn.Linear:
+                setattr(module, name, QuantizedLinear(child.in_features, child.out_features,
+                                                      bias_=child.bias is not None, dtype=torch.qint8))
+    # from_pretrained reads the generation settings (beams, maximum length...) too
+    try:
+        model.generation_config = GenerationConfig.from_pretrained(model_name)
+    except OSError:
+        pass
+    return model.eval()
+
+
+def load_quantized_model(model_name: str, cache_dir: str = DEFAULT_CACHE_DIR):
+    """Return the quantized model_name, with the cached weights or quantized now and saved to the cache.
+    """
+    import torch
+    from transformers import AutoModelForSeq2SeqLM
+    filepath = quantized_model_path(model_name, cache_dir)
+    if os.path.isfile(filepath):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            model = build_quantized_model(model_name)
+            # assign replaces the meta tensors with the loaded ones instead of copying into them
+            model.load_state_dict(torch.load(filepath, weights_only=True), assign=True)
+        # Buffers left out of the state_dict (non persistent) would still be empty
+        if not any(tensor.is_meta for tensor in itertools.chain(model.parameters(), model.buffers())):
+            return model
+
+    model = quantize_model(AutoModelForSeq2SeqLM.from_pretrained(model_name))
+    os.makedirs(cache_dir, exist_ok=True)
+    # Save and rename, so a worker never loads a half written file
+    temporary_filepath = f"{filepath}.{os.getpid()}.tmp"
+    torch.save(model.state_dict(), temporary_filepath)
+    os.replace(temporary_filepath, filepath)
+    return model
+
+
+def prepare_quantized_model(model_name: str, cache_dir: str = DEFAULT_CACHE_DIR) -> str:
+    """Quantize model_name into the cache if it is not there yet, before starting worker processes.
+
+    :return: the file of the cached quantized model
+    """
+    filepath = quantized_model_path(model_name, cache_dir)
+    if not os.path.isfile(filepath):
+        load_quantized_model(model_name, cache_dir)
+    return filepath
+
+
+def load_translator(model_name: str, quantize: bool = False, cache_dir: str = DEFAULT_CACHE_DIR):
+    """Return a translation pipeline of model_name, with the quantized model if quantize.
+    """
+    from transformers import pipeline
+    if not quantize:
+        return pipeline("translation", model=model_name)
+
+    from transformers import AutoTokenizer
+    return pipeline("translation", model=load_quantized_model(model_name, cache_dir),
+                    tokenizer=AutoTokenizer.from_pretrained(model_name))
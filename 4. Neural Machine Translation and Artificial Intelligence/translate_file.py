@@ -1,39 +1,168 @@
-import codecs
+import os
 import sys
+import time
+import argparse
+import multiprocessing
 import srx_segmenter
 import regex
-from transformers import pipeline
-
-
-inputfilename=sys.argv[1]
-outputfilename=sys.argv[2]
-
-srxfile="segment.srx"
-srxlang="English"
-
-model_name = "Helsinki-NLP/opus-mt-en-es"
-translator = pipeline("translation", model=model_name)
-
-rules = srx_segmenter.parse(srxfile)
-
-inputstream=codecs.open(inputfilename,"r",encoding="utf-8")
-outputstream=codecs.open(outputfilename,"w",encoding="utf-8")
-
-for linia in inputstream:
-    linia=linia.rstrip()
-    segmenter = srx_segmenter.SrxSegmenter(rules[srxlang],linia)
-    segments=segmenter.extract() 
-    liniatrad=[]
-    contsegment=0
-    for segment in segments[0]:
-        print(segment)
-        translation_result = translator(segment)
-        translated_text = translation_result[0]['translation_text']
-        print(translated_text)
-        print("-------------------------")
-        liniatrad.append(translated_text)
-        liniatrad.append(segments[1][contsegment])
-        contsegment+=1
-    liniatrad="".join(liniatrad)   
-    outputstream.write(liniatrad+"\n")
-    
+import checkpoint
+import translation_cache
+import translation_client
+import parallel_translation
+import quantized_translation
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Segments a text file with SRX and translates each segment (en-es)."
+    )
+    parser.add_argument("inputfile", help="The input text file (plain or compressed).")
+    parser.add_argument("outputfile", help="The translated output file.")
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted run from the checkpoint saved next to the output file."
+    )
+    parser.add_argument(
+        "--checkpoint-lines",
+        type=int,
+        default=100,
+        help="Number of input lines translated between two checkpoints (default: 100)."
+    )
+    parser.add_argument(
+        "-b", "--batch-size",
+        type=int,
+        default=16,
+        help="Number of segments of similar length translated with one model call (default: 16, 1 = one call per segment)."
+    )
+    parser.add_argument(
+        "--cache",
+        metavar="FILE",
+        help="SQLite translation cache, reused across runs (default: in-memory cache only)."
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=100000,
+        help="Number of translations kept in the in-memory LRU cache (default: 100000)."
+    )
+    parser.add_argument(
+        "--server",
+        metavar="URL",
+        help="Translate with a running translation_server.py (e.g. http://127.0.0.1:8765) instead of loading the model."
+    )
+    parser.add_argument(
+        "-w", "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes, each with its own copy of the model (default: 1)."
+    )
+    parser.add_argument(
+        "-t", "--threads-per-worker",
+        type=int,
+        default=None,
+        help="PyTorch threads per worker, pinned to their own cores with --workers (default: PyTorch's choice, or CPUs / workers)."
+    )
+    parser.add_argument(
+        "-q", "--quantize",
+        action="store_true",
+        help="Load the model with int8 dynamic quantization of its linear layers, smaller and faster on CPU."
+    )
+    parser.add_argument(
+        "--quantized-cache",
+        metavar="DIR",
+        default=quantized_translation.DEFAULT_CACHE_DIR,
+        help="Directory of the quantized model weights (default: quantized-models, next to the scripts)."
+    )
+    args = parser.parse_args()
+    if args.quantize and args.server:
+        parser.error("--quantize loads the model in this process, it can not be used with --server")
+    if args.workers > 1 and args.server:
+        parser.error("--workers loads the model in every worker, it can not be used with --server")
+
+    inputfilename=args.inputfile
+    outputfilename=args.outputfile
+
+    if not os.path.isfile(inputfilename):
+        print(f"Error: Input file not found '{inputfilename}'", file=sys.stderr)
+        sys.exit(1)
+
+    model_name = "Helsinki-NLP/opus-mt-en-es"
+    workers = max(1, args.workers)
+    threads_per_worker = args.threads_per_worker
+    if workers > 1 and not threads_per_worker:
+        threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+
+    # Repeated segments are translated once, and never again with --cache;
+    # with --workers every worker has its own cache and this one adds up their counters
+    # Quantized translations are cached apart from the fp32 ones
+    cache=translation_cache.TranslationCache(parallel_translation.cache_model_name(model_name,args.quantize),
+                                             args.cache if workers == 1 else None,args.cache_size)
+
+    # The checkpoint (outputfile.checkpoint) is saved after every chunk of input
+    # lines whose translations are on disk
+    progress=checkpoint.Checkpoint(outputfilename)
+    outputstream=checkpoint.open_output(outputfilename,progress,args.resume)
+    if progress.input_lines:
+        print(f"Resuming after input line {progress.input_lines}.", file=sys.stderr)
+    lines_done=progress.input_lines
+    chunks=checkpoint.iter_line_chunks(inputfilename,progress.input_offset,max(1,args.checkpoint_lines))
+
+    pool=None
+    if workers > 1:
+        if args.quantize:
+            # Convert the model once here, not once in every worker
+            quantized_translation.prepare_quantized_model(model_name,args.quantized_cache)
+        pool=multiprocessing.Pool(workers, parallel_translation.init_worker,
+                                  (model_name, args.cache, args.cache_size, max(1, args.batch_size),
+                                   threads_per_worker, multiprocessing.Value('i', 0), args.quantize,
+                                   args.quantized_cache))
+        # imap returns the chunks in input order, whatever worker finishes first
+        results=pool.imap(parallel_translation.translate_chunk, chunks)
+    else:
+        if threads_per_worker:
+            parallel_translation.set_threads(threads_per_worker)
+        translator = translation_client.get_translator(model_name, args.server, args.quantize, args.quantized_cache)
+        segmenter = srx_segmenter.SrxRules(parallel_translation.SRX_FILE).get_segmenter(parallel_translation.SRX_LANG)
+
+        def translate_chunks():
+            for lines, input_offset in chunks:
+                translated_lines, pairs = parallel_translation.translate_lines(lines, segmenter, translator, cache,
+                                                                               args.batch_size)
+                cache.commit()
+                yield translated_lines, pairs, input_offset, (0, 0, 0)
+        results=translate_chunks()
+
+    segment_count=0
+    line_count=0
+    start_time=time.perf_counter()
+    for translated_lines, pairs, input_offset, counters in results:
+        for segment, translated_text in pairs:
+            print(segment)
+            print(translated_text)
+            print("-------------------------")
+        for liniatrad in translated_lines:
+            outputstream.write(liniatrad+"\n")
+        segment_count+=len(pairs)
+        line_count+=len(translated_lines)
+        lines_done+=len(translated_lines)
+        cache.memory_hits+=counters[0]
+        cache.disk_hits+=counters[1]
+        cache.misses+=counters[2]
+        progress.commit(outputstream,input_offset,lines_done)
+    elapsed=time.perf_counter()-start_time
+
+    if pool is not None:
+        pool.close()
+        pool.join()
+    outputstream.close()
+    progress.remove()
+    cache.close()
+    cache.report()
+    threads = f"{threads_per_worker} threads" if threads_per_worker else "default threads"
+    print(f"Translated {segment_count} segments ({line_count} lines) in {elapsed:.1f} s: "
+          f"{segment_count / max(elapsed, 1e-9):.1f} segments/s, {workers} workers x {threads}.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
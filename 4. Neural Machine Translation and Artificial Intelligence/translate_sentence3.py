@@ -1,8 +1,9 @@
-from transformers import pipeline
 import sys
+import translation_client
 
 model_name = "Helsinki-NLP/opus-mt-en-es"
-translator = pipeline("translation", model=model_name)
+# Optional argument: the URL of a running translation_server.py, used instead of loading the model
+translator = translation_client.get_translator(model_name, sys.argv[1] if len(sys.argv) > 1 else None)
 
 while 1:
     source_sentence = input("Enter the sentence to translate or X to eXit: ")
@@ -0,0 +1,138 @@
+"""Cache of segment translations, in memory (LRU) and on disk (SQLite).
+
+Translations are keyed on a hash of (model name, source segment), so a
+cache file can be shared by several models. Repeated segments are then
+answered without running the model, within a run from the in-memory LRU
+and across runs from the SQLite file.
+"""
+__version__ = '0.0.1'
+
+import hashlib
+import sqlite3
+import sys
+from collections import OrderedDict
+from typing import (
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence
+)
+
+
+class TranslationCache:
+    """LRU cache of translations, optionally backed by a SQLite file.
+
+    :param model_name: is the name of the translation model
+    :param filepath: is the SQLite file, None for an in-memory cache only
+    :param capacity: is the maximum number of translations kept in memory
+    """
+    def __init__(self, model_name: str, filepath: Optional[str] = None, capacity: int = 100000) -> None:
+        self.model_name = model_name
+        self.capacity = max(1, capacity)
+        self.memory = OrderedDict()  # type: OrderedDict[bytes, str]
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.connection = None
+        if filepath:
+            self.connection = sqlite3.connect(filepath)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS translations "
+                "(key BLOB PRIMARY KEY, model TEXT, source TEXT, translation TEXT) WITHOUT ROWID"
+            )
+            self.connection.commit()
+
+    def __enter__(self) -> 'TranslationCache':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def key(self, segment: str) -> bytes:
+        """Return the cache key of segment for this model.
+        """
+        return hashlib.blake2b((self.model_name + '\0' + segment).encode('utf-8'), digest_size=16).digest()
+
+    def _remember(self, key: bytes, translation: str) -> None:
+        self.memory[key] = translation
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.capacity:
+            self.memory.popitem(last=False)
+
+    def get(self, segment: str) -> Optional[str]:
+        """Return the cached translation of segment, None if it is not cached.
+        """
+        key = self.key(segment)
+        translation = self.memory.get(key)
+        if translation is not None:
+            self.memory.move_to_end(key)
+            self.memory_hits += 1
+            return translation
+        if self.connection is not None:
+            row = self.connection.execute("SELECT translation FROM translations WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._remember(key, row[0])
+                self.disk_hits += 1
+                return row[0]
+        self.misses += 1
+        return None
+
+    def put_many(self, segments: Sequence[str], translations: Sequence[str]) -> None:
+        """Cache the translations of segments.
+        """
+        rows = []
+        for segment, translation in zip(segments, translations):
+            key = self.key(segment)
+            self._remember(key, translation)
+            rows.append((key, self.model_name, segment, translation))
+        if self.connection is not None and rows:
+            self.connection.executemany("INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?)", rows)
+
+    def translate(self, segments: Sequence[str], translate_function: Callable[[List[str]], List[str]]) -> List[str]:
+        """Return the translations of segments, calling translate_function once for the segments not cached.
+
+        A segment repeated in segments is only translated once.
+        """
+        translations = [None] * len(segments)  # type: List[Optional[str]]
+        missing = {}  # type: Dict[str, List[int]]
+        for index, segment in enumerate(segments):
+            if segment in missing:
+                missing[segment].append(index)
+                self.memory_hits += 1
+                continue
+            translation = self.get(segment)
+            if translation is None:
+                missing[segment] = [index]
+            else:
+                translations[index] = translation
+        if missing:
+            sources = list(missing)
+            new_translations = translate_function(sources)
+            self.put_many(sources, new_translations)
+            for source, translation in zip(sources, new_translations):
+                for index in missing[source]:
+                    translations[index] = translation
+        return translations
+
+    def commit(self) -> None:
+        """Write the new translations to the cache file.
+        """
+        if self.connection is not None:
+            self.connection.commit()
+
+    def close(self) -> None:
+        if self.connection is not None:
+            self.connection.commit()
+            self.connection.close()
+            self.connection = None
+
+    def report(self, stream=sys.stderr) -> None:
+        """Print the hit and miss counters.
+        """
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        hit_rate = (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0
+        print(f"Translation cache: {self.memory_hits} hits in memory, {self.disk_hits} hits on disk, "
+              f"{self.misses} misses ({hit_rate:.1%} hits).", file=stream)
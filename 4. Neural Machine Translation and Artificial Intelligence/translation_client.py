@@ -0,0 +1,74 @@
+"""Client of translation_server.py, usable in place of a transformers translation pipeline.
+
+get_translator() returns a TranslationClient when a server URL is given
+(or set in the TRANSLATION_SERVER environment variable), and otherwise
+loads the model in the process as before, quantized if asked.
+"""
+__version__ = '0.0.2'
+
+import json
+import os
+import urllib.error
+import urllib.request
+import quantized_translation
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Union
+)
+
+SERVER_VARIABLE = "TRANSLATION_SERVER"
+
+
+class TranslationClient:
+    """Translate with a running translation server.
+
+    Calls return ``[{'translation_text': ...}, ...]`` like a translation
+    pipeline, so the scripts use both the same way.
+    """
+    def __init__(self, server_url: str, model_name: Optional[str] = None, timeout: float = 600) -> None:
+        self.server_url = server_url.rstrip('/')
+        self.model_name = model_name
+        self.timeout = timeout
+
+    def translate(self, texts: Sequence[str]) -> List[str]:
+        """Return the translations of texts.
+
+        :raises ConnectionError: if the server can not be reached or fails
+        :raises ValueError: if the server runs another model than model_name
+        """
+        request = urllib.request.Request(
+            self.server_url + "/translate",
+            data=json.dumps({"texts": list(texts)}).encode('utf-8'),
+            headers={"Content-Type": "application/json"}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                content = json.loads(response.read().decode('utf-8'))
+        except urllib.error.HTTPError as e:
+            raise ConnectionError(f"Translation server error {e.code}: {e.read().decode('utf-8', 'replace')}")
+        except urllib.error.URLError as e:
+            raise ConnectionError(f"Translation server not reachable at {self.server_url}: {e.reason}")
+        if self.model_name and content["model"] != self.model_name:
+            raise ValueError(f"The translation server runs '{content['model']}', not '{self.model_name}'")
+        return content["translations"]
+
+    def __call__(self, texts: Union[str, Sequence[str]], **kwargs) -> List[Dict[str, str]]:
+        if isinstance(texts, str):
+            texts = [texts]
+        return [{'translation_text': translation} for translation in self.translate(texts)]
+
+
+def get_translator(model_name: str, server_url: Optional[str] = None, quantize: bool = False,
+                   quantized_cache: str = quantized_translation.DEFAULT_CACHE_DIR):
+    """Return a client of the server at server_url, or a pipeline loading model_name without server.
+
+    :param quantize: is True to load model_name with int8 linear layers, see quantized_translation
+    """
+    server_url = server_url or os.environ.get(SERVER_VARIABLE)
+    if server_url:
+        return TranslationClient(server_url, model_name)
+
+    return quantized_translation.load_translator(model_name, quantize, quantized_cache)
@@ -0,0 +1,195 @@
+"""Local translation server: loads the model once and serves translations over HTTP.
+
+Requests arriving within a few milliseconds of each other are grouped
+into one micro-batch, translated in length buckets by batch_translation,
+and answered separately. The front-ends use it through translation_client.
+
+Protocol (JSON over HTTP, on localhost by default):
+    POST /translate  {"texts": ["...", ...]}  ->  {"model": "...", "translations": ["...", ...]}
+    GET  /health                              ->  {"model": "...", "status": "ok"}
+
+Example usage:
+    python translation_server.py --port 8765
+    python translation_server.py --port 8765 --quantize
+    python translate_file.py text.txt text-es.txt --server http://127.0.0.1:8765
+"""
+__version__ = '0.0.2'
+
+import argparse
+import json
+import queue
+import sys
+import threading
+import time
+import batch_translation
+import quantized_translation
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import (
+    Callable,
+    List,
+    Optional
+)
+
+DEFAULT_MODEL = "Helsinki-NLP/opus-mt-en-es"
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+class _Request:
+    def __init__(self, texts: List[str]) -> None:
+        self.texts = texts
+        self.translations = None  # type: Optional[List[str]]
+        self.error = None  # type: Optional[Exception]
+        self.done = threading.Event()
+
+
+class MicroBatcher:
+    """Group the texts of concurrent requests into batches for one translate_function call.
+
+    A batch is closed window seconds after its first request arrives, or
+    as soon as it holds max_batch texts.
+    """
+    def __init__(self, translate_function: Callable[[List[str]], List[str]],
+                 window: float = 0.005, max_batch: int = 64) -> None:
+        self.translate_function = translate_function
+        self.window = window
+        self.max_batch = max(1, max_batch)
+        self.queue = queue.Queue()  # type: queue.Queue
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def translate(self, texts: List[str]) -> List[str]:
+        """Return the translations of texts, once their batch has been translated.
+        """
+        if not texts:
+            return []
+        request = _Request(texts)
+        self.queue.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.translations
+
+    def _run(self) -> None:
+        while True:
+            batch = [self.queue.get()]
+            text_count = len(batch[0].texts)
+            deadline = time.monotonic() + self.window
+            while text_count < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    request = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                batch.append(request)
+                text_count += len(request.texts)
+
+            texts = [text for request in batch for text in request.texts]
+            try:
+                translations = self.translate_function(texts)
+            except Exception as e:
+                for request in batch:
+                    request.error = e
+                    request.done.set()
+                continue
+            position = 0
+            for request in batch:
+                request.translations = translations[position:position + len(request.texts)]
+                position += len(request.texts)
+                request.done.set()
+
+
+class TranslationServer(ThreadingHTTPServer):
+    """Threaded HTTP server with room for many clients connecting at once.
+    """
+    request_queue_size = 128
+
+
+def make_handler(batcher: MicroBatcher, model_name: str):
+    """Return the request handler class of a server translating with batcher.
+    """
+    class TranslationHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status: int, content: dict) -> None:
+            body = json.dumps(content, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:
+            if self.path != "/health":
+                self._send_json(404, {"error": "Not found"})
+                return
+            self._send_json(200, {"model": model_name, "status": "ok"})
+
+        def do_POST(self) -> None:
+            if self.path != "/translate":
+                self._send_json(404, {"error": "Not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                texts = json.loads(self.rfile.read(length).decode('utf-8'))["texts"]
+                if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+                    raise ValueError("texts must be a list of strings")
+            except (ValueError, KeyError, TypeError) as e:
+                self._send_json(400, {"error": f"Bad request: {e}"})
+                return
+            try:
+                translations = batcher.translate(texts)
+            except Exception as e:
+                self._send_json(500, {"error": f"Translation failed: {e}"})
+                return
+            self._send_json(200, {"model": model_name, "translations": translations})
+
+        def log_message(self, format, *args) -> None:
+            # One line per request would flood the console
+            pass
+
+    return TranslationHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serves translations from a model loaded once, with micro-batching of concurrent requests.",
+        epilog=__doc__[__doc__.index("Example usage:"):],
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"Address to listen on (default: {DEFAULT_HOST}).")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port to listen on (default: {DEFAULT_PORT}).")
+    parser.add_argument("-m", "--model", default=DEFAULT_MODEL, help=f"Translation model (default: {DEFAULT_MODEL}).")
+    parser.add_argument("--window-ms", type=float, default=5.0,
+                        help="Milliseconds to wait for more requests before translating a batch (default: 5).")
+    parser.add_argument("--max-batch", type=int, default=64,
+                        help="Maximum number of texts in a micro-batch (default: 64).")
+    parser.add_argument("-b", "--batch-size", type=int, default=16,
+                        help="Number of texts of similar length per model call (default: 16).")
+    parser.add_argument("-q", "--quantize", action="store_true",
+                        help="Load the model with int8 dynamic quantization of its linear layers.")
+    parser.add_argument("--quantized-cache", metavar="DIR", default=quantized_translation.DEFAULT_CACHE_DIR,
+                        help="Directory of the quantized model weights (default: quantized-models, next to the scripts).")
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    translator = quantized_translation.load_translator(args.model, args.quantize, args.quantized_cache)
+    quantized = " (int8)" if args.quantize else ""
+    print(f"Model '{args.model}'{quantized} loaded in {time.perf_counter() - start_time:.1f} s.", file=sys.stderr)
+
+    batcher = MicroBatcher(
+        lambda texts: batch_translation.translate_segments(texts, translator, args.batch_size),
+        args.window_ms / 1000, args.max_batch
+    )
+    server = TranslationServer((args.host, args.port), make_handler(batcher, args.model))
+    print(f"Translation server listening on http://{args.host}:{args.port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()